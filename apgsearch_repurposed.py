@@ -2327,8 +2327,7 @@ class Soup:
         # put the seed in Golly
         for x in range(seed.xspan):
             for y in range(seed.yspan):
-                state = seed.cells[x][y]
-                g.setcell(x, y, state)
+                g.setcell(x, y, int(seed.cells[x][y]))
         
         # Parameters for self.teenager():
         #
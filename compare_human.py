@@ -163,6 +163,10 @@ for dir_name, subdir_list, file_list in os.walk(pattern_dir):
         str(designed_seed_density) + "\t" + \
         str(avg_designed_score) + "\t" + str(avg_evolved_score) + "\n")
 #
+# Save the contest cache (see contest_cache_path in model_parameters.py).
+#
+mfunc.save_contest_cache()
+#
 # close the files for recording results
 #
 text_file.close()
@@ -153,6 +153,10 @@ for gen_num in range(num_generations + 1):
     #
   #
 #
+# Save the contest cache (see contest_cache_path in model_parameters.py).
+#
+mfunc.save_contest_cache()
+#
 # Final message
 #
 mfunc.show_message(g, analysis_handle, "\nAnalysis complete.\n")
@@ -124,6 +124,10 @@ for i in range(0, final_num + 1, step_size):
   mfunc.show_message(g, analysis_handle, \
     str(i) + tab + tab.join(avg_fitnesses) + "\n")
 #
+# Save the contest cache (see contest_cache_path in model_parameters.py).
+#
+mfunc.save_contest_cache()
+#
 # Final message.
 #
 mfunc.show_message(g, analysis_handle, "\nAnalysis complete.\n")
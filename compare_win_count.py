@@ -100,31 +100,41 @@ for pickle_num in range(num_generations + 1):
 # reasonable, since the first seed is randomly generated
 # and there is no earlier generation we can compare it to.
 #
+# List every pair of an old winner and a new winner, so that
+# the contests of all the pairs can be played together.
+#
+pairs = []
+for new_seed_num in range(1, num_generations + 1):
+  new_seed = winning_seeds[new_seed_num]
+  for old_seed_num in range(new_seed_num):
+    old_seed = winning_seeds[old_seed_num]
+    pairs.append([old_seed, new_seed])
+#
+# new_seed wins if it wins at least num_wins of num_trials
+# contests; the contests of a pair stop as soon as this is
+# settled (see win_tests() in model_functions.py)
+#
+new_seed_wins = mfunc.win_tests(g, pairs, width_factor, \
+  height_factor, time_factor, num_trials, num_wins)
+#
+first = 0
 for new_seed_num in range(num_generations + 1):
-  # if this is the first seed, then its score is zero ...
-  if (new_seed_num == 0):
-    new_seed_score = 0
-    mfunc.show_message(g, analysis_handle, 
-      str(new_seed_num) + "\t" + str(new_seed_score) + "\n")
-  # if this is not the first seed ...
-  else:
-    new_seed = winning_seeds[new_seed_num]
-    # initialize sum of scores
-    new_seed_score = 0
-    # compare all the old winners to new_seed
-    for old_seed_num in range(new_seed_num):
-      old_seed = winning_seeds[old_seed_num]
-      [old_score, new_score] = mfunc.score_pair(g, \
-        old_seed, new_seed, width_factor, height_factor, \
-        time_factor, num_trials)
-      # increment sum of scores
-      if (new_score >= float(num_wins) / num_trials):
-        new_seed_score = new_seed_score + 1
-    # write result to output file
-    mfunc.show_message(g, analysis_handle, 
-      str(new_seed_num) + "\t" + str(new_seed_score) + "\n")
-    #
-  #
+  # initialize sum of scores; if this is the first seed,
+  # then its score is zero
+  new_seed_score = 0
+  # count the old winners that new_seed beat
+  for old_seed_num in range(new_seed_num):
+    if (new_seed_wins[first + old_seed_num]):
+      new_seed_score = new_seed_score + 1
+  first = first + new_seed_num
+  # write result to output file
+  mfunc.show_message(g, analysis_handle, 
+    str(new_seed_num) + "\t" + str(new_seed_score) + "\n")
+#
+#
+# Save the contest cache (see contest_cache_path in model_parameters.py).
+#
+mfunc.save_contest_cache()
 #
 # Final message
 #
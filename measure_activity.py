@@ -110,10 +110,13 @@ for i in range(num_generations + 1):
     # - when we flatten the seed matrix into a string, note that two differently shaped
     # matrices might possibly flatten to the same string; therefore we prefix the
     # string with the dimensions of the given seed matrix
+    # - rotations and flips of a seed play the same games, so we count
+    #   them as one seed, using the canonical form of the seed matrix
+    cells = mfunc.canonical_cells(seed.cells)
     # - flatten the matrix of the seed
-    flat_seed = seed.cells.flatten()
+    flat_seed = cells.flatten()
     # - add in the dimensions and convert to string
-    seed_string = str(seed.xspan) + " " + str(seed.yspan) + \
+    seed_string = str(cells.shape[0]) + " " + str(cells.shape[1]) + \
       " " + "".join(map(str, flat_seed))
     # update the hash table
     if seed_string in hash_seed_to_list.keys():
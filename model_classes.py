@@ -3,11 +3,91 @@ Model Classes
 
 Peter Turney, January 21, 2020
 """
-import golly as g
 import model_parameters as mparam
+import model_engine as mengine
 import random as rand
 import numpy as np
-import copy
+import collections
+import os
+import pickle
+import sys
+"""
+Make a random number generator for NumPy.
+"""
+#
+# The cells of seeds are drawn in bulk with NumPy. The NumPy generator
+# is seeded from the random module, so a run with a given random_seed
+# (see model_parameters.py) is repeatable, and a checkpoint, which saves
+# the state of the random module, also fixes the cells still to come.
+#
+# numpy_random() -- returns generator
+#
+def numpy_random():
+  """
+  Make a NumPy random number generator, seeded from the random module.
+  """
+  return np.random.RandomState(rand.getrandbits(32))
+"""
+Make functions for storing and loading pickles safely.
+"""
+#
+# Checkpoints and the contest cache are pickled to files that a later
+# run reads back. A crash while a file is being written must not leave
+# a damaged file in place of the previous one, so the pickle is first
+# written to a temporary file, path.tmp. Windows will not rename a file
+# over an existing file, so the previous file is moved aside to path.old
+# before path.tmp is renamed to path, and path.old is removed after.
+# If the machine stops between these steps (Windows Update restarts the
+# computer, for example), one of the three files is always complete;
+# load_pickle() finds it.
+#
+# atomic_pickle(obj, path) -- returns NULL
+#
+def atomic_pickle(obj, path):
+  """
+  Pickle obj to the file path by way of the temporary file path.tmp.
+  """
+  temp_path = path + ".tmp"
+  old_path = path + ".old"
+  temp_handle = open(temp_path, "wb") # wb = write binary
+  pickle.dump(obj, temp_handle, pickle.HIGHEST_PROTOCOL)
+  temp_handle.flush()
+  os.fsync(temp_handle.fileno())
+  temp_handle.close()
+  if (os.path.exists(path)):
+    if (os.path.exists(old_path)):
+      os.remove(old_path)
+    os.rename(path, old_path)
+  os.rename(temp_path, path)
+  if (os.path.exists(old_path)):
+    os.remove(old_path)
+  # 
+  # returns NULL
+  # 
+#
+# load_pickle(path) -- returns obj
+#
+def load_pickle(path):
+  """
+  Load a pickle that was stored by atomic_pickle(). If path is missing,
+  the save was interrupted: if path.old exists, path.tmp was complete
+  before path was moved to path.old, so path.tmp is loaded, or else
+  path.old. Returns None if there is no complete file.
+  """
+  temp_path = path + ".tmp"
+  old_path = path + ".old"
+  if (os.path.exists(path)):
+    load_path = path
+  elif (os.path.exists(old_path) and os.path.exists(temp_path)):
+    load_path = temp_path
+  elif (os.path.exists(old_path)):
+    load_path = old_path
+  else:
+    return None
+  load_handle = open(load_path, "rb") # rb = read binary
+  obj = pickle.load(load_handle)
+  load_handle.close()
+  return obj
 """
 Make a class for seeds.
 """
@@ -22,32 +102,105 @@ Make a class for seeds.
 #     self.xspan = self.cells.shape[0]
 #     self.yspan = self.cells.shape[1]
 #
-class Seed:
+# Seeds are kept small, since the archives of a run hold many of them:
+# the attributes are in slots rather than in a dictionary, and the cells
+# (which are only 0, 1 or 2) are bytes. A seed that is not in a
+# population does not need its history and similarities, which are as
+# long as the population, so they may be None (see detach()).
+#
+# Seeds are copy-on-write: no method changes the cells of a seed in
+# place; a method that changes the cells gives the seed a new array.
+# So a light copy of a seed (see view()) can share the arrays of the
+# seed, and only the cells that change are ever copied.
+#
+class Seed(object):
   """
   A class for seeds.
   """
+  __slots__ = ["xspan", "yspan", "cells", "history", "similarities", \
+    "address", "num_living"]
   #
   # __init__(self, xspan, yspan, pop_size) -- returns NULL
   #
-  def __init__(self, xspan, yspan, pop_size):
+  # The arguments have defaults only because pickles of the old Seed
+  # class call Seed() with no arguments before __setstate__().
+  #
+  def __init__(self, xspan = 0, yspan = 0, pop_size = 0):
     """
-    Make an empty seed (all zeros).
+    Make an empty seed (all zeros). If pop_size is 0, the seed has
+    no history and no similarities.
     """
     # width of seed on the x-axis
     self.xspan = xspan 
     # height of seed on the y-axis
     self.yspan = yspan 
     # initial seed of zeros, to be modified later
-    self.cells = np.zeros((xspan, yspan), dtype=np.int) 
-    # initial history of zeros
-    self.history = np.zeros(pop_size, dtype=np.float) 
-    # initial similarities of zeros
-    self.similarities = np.zeros(pop_size, dtype=np.float) 
+    self.cells = np.zeros((xspan, yspan), dtype=np.uint8) 
+    if (pop_size > 0):
+      # initial history of zeros
+      self.history = np.zeros(pop_size, dtype=np.float) 
+      # initial similarities of zeros
+      self.similarities = np.zeros(pop_size, dtype=np.float) 
+    else:
+      self.history = None
+      self.similarities = None
     # position of seed in the population array, to be modified later
     self.address = 0 
     # count of living cells (ones) in the seed, to be modified later
     self.num_living = 0
   #
+  # __getstate__(self) -- returns state
+  #
+  def __getstate__(self):
+    """
+    Pickle a seed as a dictionary of its attributes, like the old
+    Seed class.
+    """
+    state = {}
+    for name in Seed.__slots__:
+      state[name] = getattr(self, name)
+    return state
+  #
+  # __setstate__(self, state) -- returns NULL
+  #
+  def __setstate__(self, state):
+    """
+    Unpickle a seed from its dictionary. Pickles of the old Seed
+    class have the same dictionary, but with cells of 64-bit
+    integers, which are converted to bytes.
+    """
+    for name in Seed.__slots__:
+      setattr(self, name, state[name])
+    self.cells = np.asarray(self.cells, dtype=np.uint8)
+  #
+  # view(self) -- returns new_seed
+  #
+  def view(self):
+    """
+    Make a light copy of the seed, which shares the cells, history
+    and similarities of the seed instead of copying them. Since the
+    cells are copy-on-write, changing the cells of the copy does not
+    change the seed. The history and similarities are only shared for
+    reading: a population copies them when it takes a seed (see
+    Population), and a new child gets a new history (see mutate()).
+    """
+    new_seed = Seed.__new__(Seed)
+    for name in Seed.__slots__:
+      setattr(new_seed, name, getattr(self, name))
+    return new_seed
+  #
+  # detach(self) -- returns NULL
+  #
+  def detach(self):
+    """
+    Drop the history and similarities of a seed, to save memory
+    when the seed is kept outside of a population, as in an
+    archive that is read for analysis. The seed can still play in
+    contests, and it gets a new history if it is put in a population.
+    """
+    self.history = None
+    self.similarities = None
+  #
   # randomize(self, seed_density) -- returns NULL
   #
   def randomize(self, seed_density):
@@ -59,10 +212,9 @@ class Seed:
     variation). Strictly speaking, seed_density is the
     expected value of the fraction of cells in state 1.
     """
-    for x in range(self.xspan):
-      for y in range(self.yspan):
-        if (rand.random() <= seed_density):
-          self.cells[x][y] = 1
+    generator = numpy_random()
+    mask = generator.random_sample((self.xspan, self.yspan)) <= seed_density
+    self.cells = np.where(mask, 1, self.cells).astype(np.uint8)
   #
   # shuffle(self) -- returns a shuffled copy of the given seed
   #
@@ -78,18 +230,13 @@ class Seed:
     of the given seed.
     """
     #
-    shuffled_seed = copy.deepcopy(self)
+    shuffled_seed = self.view()
     #
-    # for each location [x0][y0], randomly choose another location
-    # [x1][y1] and swap the values of the cells in the two locations.
+    # put the cells in a random order, with every order equally likely
     #
-    for x0 in range(self.xspan):
-      for y0 in range(self.yspan):
-        x1 = rand.randrange(self.xspan)
-        y1 = rand.randrange(self.yspan)
-        temp = shuffled_seed.cells[x0][y0]
-        shuffled_seed.cells[x0][y0] = shuffled_seed.cells[x1][y1]
-        shuffled_seed.cells[x1][y1] = temp
+    generator = numpy_random()
+    shuffled_seed.cells = generator.permutation( \
+      shuffled_seed.cells.ravel()).reshape(self.xspan, self.yspan)
     #
     return shuffled_seed
   #
@@ -100,10 +247,7 @@ class Seed:
     """
     Switch cells from state 1 (red) to state 2 (blue).
     """
-    for x in range(self.xspan):
-      for y in range(self.yspan):
-        if (self.cells[x][y] == 1):
-          self.cells[x][y] = 2
+    self.cells = np.where(self.cells == 1, 2, self.cells)
   #
   # insert(self, g, g_xmin, g_xmax, g_ymin, g_ymax) -- returns NULL
   #
@@ -111,18 +255,24 @@ class Seed:
     """
     Write the seed into the Golly grid at a random location
     within the given bounds.
-    g = the Golly universe
+    g = the backend (see Backend) or the Golly universe
     s = a seed
     """
     step = 1
     g_xstart = rand.randrange(g_xmin, g_xmax - self.xspan, step)
     g_ystart = rand.randrange(g_ymin, g_ymax - self.yspan, step)
-    for s_x in range(self.xspan):
-      for s_y in range(self.yspan):
-        g_x = g_xstart + s_x
-        g_y = g_ystart + s_y
-        s_state = self.cells[s_x][s_y]
-        g.setcell(g_x, g_y, s_state)
+    # Write all of the living cells with one call to Golly, as a
+    # multi-state cell list [x1, y1, state1, x2, y2, state2, ...].
+    # The cells in state 0 can be skipped, since the seed is always
+    # inserted into an empty region of the Golly grid.
+    [s_xs, s_ys] = np.nonzero(self.cells)
+    cell_list = np.column_stack((s_xs + g_xstart, s_ys + g_ystart, \
+      self.cells[s_xs, s_ys])).ravel().tolist()
+    if (len(cell_list) > 0):
+      # a multi-state cell list must have an odd length, so pad it
+      if (len(cell_list) % 2 == 0):
+        cell_list.append(0)
+      g.putcells(cell_list)
   #
   # random_rotate(self) -- returns new_seed
   #
@@ -132,7 +282,7 @@ class Seed:
     """
     rotation = rand.randrange(0, 4, 1) # 0, 1, 2, 3
     flip = rand.randrange(0, 2, 1) # 0, 1
-    new_seed = copy.deepcopy(self)
+    new_seed = self.view()
     # rotate by 90 degrees * rotation (0, 90, 180 270)
     new_seed.cells = np.rot90(new_seed.cells, rotation) 
     if (flip == 1):
@@ -149,7 +299,7 @@ class Seed:
     Calculate a seed's fitness from its history. 
     """
     history = self.history
-    return sum(history) / len(history)
+    return np.sum(history) / len(history)
   #
   # mutate(self, prob_grow, prob_flip, prob_shrink, seed_density, mutation_rate) 
   # -- returns mutant
@@ -159,7 +309,7 @@ class Seed:
     Make a copy of self and return a mutated version of the copy.
     """
     #
-    mutant = copy.deepcopy(self)
+    mutant = self.view()
     #
     # prob_grow     = probability of invoking grow()
     # prob_flip     = probability of invoking flip_bits()
@@ -181,8 +331,9 @@ class Seed:
       # this will be invoked with a probability of prob_shrink
       mutant.shrink()
     # erase the parent's history from the child
-    pop_size = len(self.history)
-    mutant.history = np.zeros(pop_size, dtype=np.float)
+    if (self.history is not None):
+      pop_size = len(self.history)
+      mutant.history = np.zeros(pop_size, dtype=np.float)
     return mutant
   #
   # flip_bits(self, mutation_rate) -- returns NULL
@@ -192,20 +343,17 @@ class Seed:
     Mutate a seed by randomly flipping bits. Assumes the seed
     contains 0s and 1s.
     """
-    num_mutations = 0
-    for s_x in range(self.xspan):
-      for s_y in range(self.yspan):
-        if (rand.uniform(0, 1) < mutation_rate):
-          # flip cell value: 0 becomes 1 and 1 becomes 0
-          self.cells[s_x][s_y] = 1 - self.cells[s_x][s_y]
-          # count the number of mutations so far
-          num_mutations = num_mutations + 1
+    generator = numpy_random()
+    # choose the cells to flip, each with a probability of mutation_rate
+    mask = generator.random_sample((self.xspan, self.yspan)) < mutation_rate
     # force a minimum of one mutation -- there is no value
     # in having duplicates in the population
-    if (num_mutations == 0):
-      s_x = rand.randrange(self.xspan)
-      s_y = rand.randrange(self.yspan)
-      self.cells[s_x][s_y] = 1 - self.cells[s_x][s_y]
+    if (not mask.any()):
+      s_x = generator.randint(self.xspan)
+      s_y = generator.randint(self.yspan)
+      mask[s_x][s_y] = True
+    # flip cell values: 0 becomes 1 and 1 becomes 0
+    self.cells = np.where(mask, 1 - self.cells, self.cells)
   #
   # shrink(self) -- returns NULL
   #
@@ -242,38 +390,31 @@ class Seed:
     """
     # - first we need to decide how to grow
     choice = rand.choice([0, 1, 2, 3])
+    # - make a new row or column with a density of approximately
+    #   seed_density
+    generator = numpy_random()
+    if (choice < 2):
+      line_length = self.yspan
+    else:
+      line_length = self.xspan
+    line = (generator.random_sample(line_length) < seed_density).astype( \
+      self.cells.dtype)
     # - now do it
     if (choice == 0):
       # add a new row before the first row
-      self.cells = np.vstack([np.zeros(self.yspan, dtype=np.int), self.cells])
-      # initialize the new row with a density of approximately seed_density
-      for s_y in range(self.yspan):
-        if (rand.uniform(0, 1) < seed_density):
-          self.cells[0][s_y] = 1
+      self.cells = np.vstack([line, self.cells])
       #
     elif (choice == 1):
       # add a new row after the last row
-      self.cells = np.vstack([self.cells, np.zeros(self.yspan, dtype=np.int)])
-      # initialize the new row with a density of approximately seed_density
-      for s_y in range(self.yspan):
-        if (rand.uniform(0, 1) < seed_density):
-          self.cells[-1][s_y] = 1
+      self.cells = np.vstack([self.cells, line])
       #
     elif (choice == 2):
       # add a new column before the first column
-      self.cells = np.hstack([np.zeros((self.xspan, 1), dtype=np.int), self.cells])
-      # initialize the new column with a density of approximately seed_density
-      for s_x in range(self.xspan):
-        if (rand.uniform(0, 1) < seed_density):
-          self.cells[s_x][0] = 1
+      self.cells = np.hstack([line.reshape(self.xspan, 1), self.cells])
       #
     elif (choice == 3):
       # add a new column after the last column
-      self.cells = np.hstack([self.cells, np.zeros((self.xspan, 1), dtype=np.int)])
-      # initialize the new column with a density of approximately seed_density
-      for s_x in range(self.xspan):
-        if (rand.uniform(0, 1) < seed_density):
-          self.cells[s_x][-1] = 1
+      self.cells = np.hstack([self.cells, line.reshape(self.xspan, 1)])
       #
     #
     # now let's update xspan and yspan to the new size
@@ -287,12 +428,7 @@ class Seed:
     """
     Count the number of ones in a seed.
     """
-    count = 0
-    for x in range(self.xspan):
-      for y in range(self.yspan):
-        if (self.cells[x][y] == 1):
-          count = count + 1
-    return count
+    return int((self.cells == 1).sum())
   #
   # density(self) -- returns density of ones in a seed
   #
@@ -303,5 +439,602 @@ class Seed:
     return self.count_ones() / float(self.xspan * self.yspan)
   #
 #
+"""
+Make a class for populations.
+"""
+#
+# A population owns the histories and similarities of its seeds, as
+# the rows of two pop_size x pop_size matrices: scores[i][j] is the
+# score of seed i against seed j, and similarities[i][j] is the
+# similarity of seed i and seed j. The history and similarities of
+# the seed at address i are views of row i of these matrices, so
+# everything that reads seed.history or seed.similarities sees the
+# matrices. The fitnesses (the sums of the rows of scores) are kept
+# up-to-date as the scores change, so the best seeds, the worst seeds,
+# and the average fitness can be found without summing the histories.
+# The scores and similarities must be changed with set_scores() and
+# set_similarity(), rather than by writing into the histories and
+# similarities of the seeds.
+#
+class Population:
+  """
+  A class for populations of seeds.
+  """
+  #
+  # __init__(self, seeds) -- returns NULL
+  #
+  def __init__(self, seeds):
+    """
+    Make a population from a list of seeds, with their current
+    histories and similarities.
+    """
+    pop_size = len(seeds)
+    # the seeds, in order of address
+    self.seeds = []
+    # matrix of scores: row i is the history of seed i
+    self.scores = np.zeros((pop_size, pop_size), dtype=np.float)
+    # matrix of similarities: row i is the similarities of seed i
+    self.similarities = np.zeros((pop_size, pop_size), dtype=np.float)
+    # vector of fitnesses: sums of the rows of scores
+    self.fitnesses = np.zeros(pop_size, dtype=np.float)
+    for i in range(pop_size):
+      self.seeds.append(None)
+      self[i] = seeds[i]
+  #
+  # __len__(self) -- returns pop_size
+  #
+  def __len__(self):
+    """
+    The number of seeds in the population.
+    """
+    return len(self.seeds)
+  #
+  # __getitem__(self, i) -- returns seed
+  #
+  def __getitem__(self, i):
+    """
+    The seed at address i.
+    """
+    return self.seeds[i]
+  #
+  # __setitem__(self, i, seed) -- returns NULL
+  #
+  def __setitem__(self, i, seed):
+    """
+    Put the seed at address i, with its current history and
+    similarities (or zeros, if it has none; see Seed.detach()). The
+    seed that was at address i keeps a copy of its history and
+    similarities.
+    """
+    old_seed = self.seeds[i]
+    if (old_seed is not None):
+      old_seed.history = self.scores[i].copy()
+      old_seed.similarities = self.similarities[i].copy()
+    if (seed.history is not None):
+      self.scores[i] = seed.history
+    else:
+      self.scores[i] = 0.0
+    if (seed.similarities is not None):
+      self.similarities[i] = seed.similarities
+    else:
+      self.similarities[i] = 0.0
+    self.fitnesses[i] = np.sum(self.scores[i])
+    seed.history = self.scores[i]
+    seed.similarities = self.similarities[i]
+    self.seeds[i] = seed
+  #
+  # __setstate__(self, state) -- returns NULL
+  #
+  def __setstate__(self, state):
+    """
+    When a population is unpickled, make the histories and
+    similarities of the seeds views of the matrices again.
+    """
+    self.__dict__.update(state)
+    for i in range(len(self.seeds)):
+      self.seeds[i].history = self.scores[i]
+      self.seeds[i].similarities = self.similarities[i]
+  #
+  # set_scores(self, rows, cols, scores) -- returns NULL
+  #
+  def set_scores(self, rows, cols, scores):
+    """
+    Set the score of seed rows[k] against seed cols[k] to scores[k],
+    for each k, and update the fitnesses of the seeds in rows. Each
+    fitness that changes is summed again from its row of scores, so
+    that rounding errors cannot build up over a long run.
+    """
+    rows = np.asarray(rows, dtype=np.int)
+    cols = np.asarray(cols, dtype=np.int)
+    scores = np.asarray(scores, dtype=np.float)
+    self.scores[rows, cols] = scores
+    changed = np.unique(rows)
+    self.fitnesses[changed] = np.sum(self.scores[changed], axis=1)
+  #
+  # set_similarity(self, i, j, similarity) -- returns NULL
+  #
+  def set_similarity(self, i, j, similarity):
+    """
+    Set the similarity of seed i and seed j.
+    """
+    self.similarities[i, j] = similarity
+    self.similarities[j, i] = similarity
+  #
+  # fitness(self, i) -- returns fitness
+  #
+  def fitness(self, i):
+    """
+    The fitness of the seed at address i (the same as
+    self[i].fitness()).
+    """
+    return self.fitnesses[i] / len(self.seeds)
+  #
+  # best_seed(self) -- returns best_seed
+  #
+  def best_seed(self):
+    """
+    Find the seed (not necessarily unique) with maximum fitness. If
+    there are ties, the seed with the lowest address is chosen.
+    """
+    return self.seeds[np.argmax(self.fitnesses)]
+  #
+  # worst_seed(self) -- returns worst_seed
+  #
+  def worst_seed(self):
+    """
+    Find the seed (not necessarily unique) with minimum fitness. If
+    there are ties, the seed with the lowest address is chosen.
+    """
+    return self.seeds[np.argmin(self.fitnesses)]
+  #
+  # sorted_addresses(self, sample_size, decreasing) -- returns addresses
+  #
+  def sorted_addresses(self, sample_size, decreasing):
+    """
+    Find the addresses of the sample_size seeds with the highest
+    fitness (if decreasing is True) or the lowest fitness (if
+    decreasing is False), in order of fitness. Seeds with equal
+    fitness are in order of address, as with a stable sort of the
+    whole population, but only the chosen seeds are sorted.
+    """
+    pop_size = len(self.seeds)
+    assert pop_size >= sample_size
+    assert sample_size > 0
+    if (decreasing):
+      keys = - self.fitnesses
+    else:
+      keys = self.fitnesses
+    # the key of the sample_size-th seed, in order of keys
+    cutoff = np.partition(keys, sample_size - 1)[sample_size - 1]
+    # all of the seeds before the cutoff, and enough seeds at the cutoff
+    before = np.flatnonzero(keys < cutoff)
+    at = np.flatnonzero(keys == cutoff)[:(sample_size - len(before))]
+    chosen = np.concatenate([before, at])
+    # sort the chosen seeds by key and then by address
+    order = np.lexsort((chosen, keys[chosen]))
+    return chosen[order]
+  #
+  # top_seeds(self, sample_size) -- returns sample_pop
+  #
+  def top_seeds(self, sample_size):
+    """
+    Find the best (fittest) sample_size seeds, in order of
+    decreasing fitness.
+    """
+    sample_pop = []
+    for i in self.sorted_addresses(sample_size, True):
+      sample_pop.append(self.seeds[i])
+    return sample_pop
+  #
+  # bottom_seeds(self, sample_size) -- returns sample_pop
+  #
+  def bottom_seeds(self, sample_size):
+    """
+    Find the worst (least fit) sample_size seeds, in order of
+    increasing fitness.
+    """
+    sample_pop = []
+    for i in self.sorted_addresses(sample_size, False):
+      sample_pop.append(self.seeds[i])
+    return sample_pop
+  #
+  # average_fitness(self) -- returns average
+  #
+  def average_fitness(self):
+    """
+    The average fitness of the seeds in the population.
+    """
+    pop_size = len(self.seeds)
+    return np.sum(self.fitnesses) / (pop_size * pop_size)
+  #
+#
+"""
+Make a class for caching the results of contests.
+"""
+#
+# The cache maps a pair of seeds (by the keys of their cells, see
+# seed_key() in model_functions.py) and the width, height and time
+# factors of the contest to the counts of wins and ties in all of the
+# trials of the contest so far, counts = [wins1, wins2, ties]. The
+# pair (seed1, seed2) and the pair (seed2, seed1) share one entry.
+# When the cache is full, the least recently used contest is dropped.
+#
+class ContestCache:
+  """
+  A class for caching the results of contests.
+  """
+  #
+  # __init__(self, max_size, cache_path) -- returns NULL
+  #
+  def __init__(self, max_size, cache_path):
+    """
+    Make a cache for max_size contests (no cache if max_size is 0).
+    If cache_path is not the empty string and the file exists, the
+    contests in the file are loaded (see load_pickle()).
+    """
+    self.max_size = max_size
+    self.cache_path = cache_path
+    self.contests = collections.OrderedDict()
+    if ((max_size > 0) and (cache_path != "")):
+      contests = load_pickle(cache_path)
+      if (contests is not None):
+        self.contests = contests
+        self.trim()
+  #
+  # trim(self) -- returns NULL
+  #
+  def trim(self):
+    """
+    Drop the least recently used contests until there are at most
+    max_size contests in the cache.
+    """
+    while (len(self.contests) > self.max_size):
+      self.contests.popitem(last=False)
+  #
+  # lookup(self, key1, key2, factors) -- returns counts
+  #
+  def lookup(self, key1, key2, factors):
+    """
+    Find the counts of wins and ties of seed1 (with key1) against
+    seed2 (with key2). If the contest is not in the cache, the
+    counts are all zero.
+    """
+    if (key1 <= key2):
+      contest = (key1, key2, factors)
+    else:
+      contest = (key2, key1, factors)
+    if (contest not in self.contests):
+      return [0, 0, 0]
+    # move the contest to the end, as the most recently used
+    [wins1, wins2, ties] = self.contests.pop(contest)
+    self.contests[contest] = [wins1, wins2, ties]
+    if (key1 <= key2):
+      return [wins1, wins2, ties]
+    else:
+      return [wins2, wins1, ties]
+  #
+  # add(self, key1, key2, factors, counts) -- returns counts
+  #
+  def add(self, key1, key2, factors, counts):
+    """
+    Add the counts of wins and ties from new trials of seed1 (with
+    key1) against seed2 (with key2) to the cache, and return the
+    counts for all of the trials of the contest so far.
+    """
+    [wins1, wins2, ties] = self.lookup(key1, key2, factors)
+    wins1 = wins1 + counts[0]
+    wins2 = wins2 + counts[1]
+    ties = ties + counts[2]
+    if (self.max_size > 0):
+      if (key1 <= key2):
+        self.contests[(key1, key2, factors)] = [wins1, wins2, ties]
+      else:
+        self.contests[(key2, key1, factors)] = [wins2, wins1, ties]
+      self.trim()
+    return [wins1, wins2, ties]
+  #
+  # save(self) -- returns NULL
+  #
+  def save(self):
+    """
+    Store the cache in the file cache_path, if there is one (see
+    atomic_pickle()).
+    """
+    if ((self.max_size == 0) or (self.cache_path == "")):
+      return
+    atomic_pickle(self.contests, self.cache_path)
+  #
+#
+"""
+Make a class for running contests in Golly.
+"""
+#
+class ContestContext:
+  """
+  A persistent context for running contests in Golly. Setting up a
+  toroid from scratch (setalgo(), new(), setrule(), setmag()) makes
+  Golly reload the Immigration rule table, which is a large fixed
+  cost for every trial. Instead, the context keeps one Golly layer
+  for each recently used toroid size, with the algorithm, rule and
+  magnification already set, and only clears the cells between trials.
+  """
+  #
+  # __init__(self, g) -- returns NULL
+  #
+  def __init__(self, g):
+    """
+    Make a context for the Golly module g. The context starts with
+    the current layer and adds more layers as needed, up to the
+    maximum number of layers that Golly allows.
+    """
+    self.g = g
+    # the largest number of layers the context may use, counting
+    # the current layer but not any other layers the user has open
+    self.max_layers = g.maxlayers() - g.numlayers() + 1
+    # map from toroid size (g_width, g_height) to Golly layer index
+    self.layers = {}
+    # toroid sizes in self.layers, least recently used first
+    self.recent = []
+    # do not update the view unless requested
+    g.autoupdate(False)
+  #
+  # prepare(self, g_width, g_height) -- returns new_layer
+  #
+  def prepare(self, g_width, g_height):
+    """
+    Make the current Golly layer an empty toroid of the given size.
+    Returns True if the layer was newly set up for this size (so the
+    caller may want to set the magnification) and False if an existing
+    layer for this size was cleared and reused.
+    """
+    g = self.g
+    size = (g_width, g_height)
+    #
+    # If there is already a layer for this size, clear and reuse it.
+    #
+    if (size in self.layers):
+      g.setlayer(self.layers[size])
+      self.recent.remove(size)
+      self.recent.append(size)
+      # the same coordinates as get_minmax() in model_functions.py
+      g_xmin = - int(g_width / 2)
+      g_ymin = - int(g_height / 2)
+      g.select([g_xmin, g_ymin, g_width, g_height])
+      g.clear(0) # clear inside the selection
+      g.select([])
+      return False
+    #
+    # Otherwise, take the current layer (the first time), a new layer,
+    # or the least recently used layer, and set it up for this size.
+    #
+    if (len(self.layers) == 0):
+      layer = g.getlayer()
+    elif (len(self.layers) < self.max_layers):
+      layer = g.addlayer() # also makes the new layer current
+    else:
+      old_size = self.recent.pop(0)
+      layer = self.layers.pop(old_size)
+      g.setlayer(layer)
+    #
+    rule_name = "Immigration"
+    g.setalgo("QuickLife")
+    g.new(rule_name) # initialize cells to state 0
+    g.setrule(rule_name + ":T" + str(g_width) + "," + str(g_height)) # make a toroid
+    #
+    self.layers[size] = layer
+    self.recent.append(size)
+    return True
+  #
+"""
+Make a class for simulation backends.
+"""
+#
+# A backend plays the Immigration Game for the contests. score_pair(),
+# update_history(), count_pops(), get_minmax() and prepare_toroid() in
+# model_functions.py, Seed.insert() and view_contest.py only use the
+# methods of the backends and the Golly calls getwidth(), getheight(),
+# putcells(), getcells(), run(), empty(), hash(), update() and show(),
+# so they work the same way with any backend. Those calls, and any
+# others (note(), getdir(), ...), are passed on to the universe that
+# the backend wraps: the Golly module or a headless Toroid (see
+# model_engine.py). The backend is chosen with contest_engine in
+# model_parameters.py (see make_backend() in model_functions.py).
+#
+class Backend:
+  """
+  The methods that are shared by all backends. A backend with
+  batch = True can also play many contests together (see
+  score_batch() in model_functions.py).
+  """
+  batch = False
+  #
+  # __getattr__(self, name) -- returns attribute
+  #
+  def __getattr__(self, name):
+    """
+    Pass any call that the backend does not have on to the universe.
+    """
+    if (name == "universe"):
+      raise AttributeError(name)
+    return getattr(self.universe, name)
+  #
+  # get_minmax(self) -- returns [g_xmin, g_xmax, g_ymin, g_ymax]
+  #
+  def get_minmax(self):
+    """
+    Calculate the min and max of the Golly toroid coordinates
+    """
+    # get height and width
+    g_xspan = self.getwidth()
+    g_yspan = self.getheight()
+    # calculate min and max
+    g_xmin = - int(g_xspan / 2)
+    g_xmax = g_xspan + g_xmin
+    g_ymin = - int(g_yspan / 2)
+    g_ymax = g_yspan + g_ymin
+    #
+    return [g_xmin, g_xmax, g_ymin, g_ymax]
+  #
+  # run_contest(self, g_time) -- returns NULL
+  #
+  def run_contest(self, g_time):
+    """
+    Run the Game of Life for g_time time steps. If early_stop_flag
+    is 1, stop as soon as the final state is known: every
+    early_stop_interval steps, check whether all cells are dead or the
+    toroid repeats a state it had at an earlier check. A repeat is
+    confirmed by running one more period and comparing all the cells,
+    and then only (steps left) mod period more steps are needed. The
+    final state is exactly the state after g_time steps.
+    """
+    interval = mparam.early_stop_interval
+    if ((mparam.early_stop_flag == 0) or (interval <= 0)):
+      self.run(g_time)
+      return
+    #
+    [g_xmin, g_xmax, g_ymin, g_ymax] = self.get_minmax()
+    rect = [g_xmin, g_ymin, g_xmax - g_xmin, g_ymax - g_ymin]
+    # map from the hash of a checked state to its time step
+    seen = {}
+    t = 0
+    while (t < g_time):
+      num_steps = min(interval, g_time - t)
+      self.run(num_steps)
+      t = t + num_steps
+      if (t == g_time):
+        break
+      # a dead toroid stays dead
+      if (self.empty()):
+        break
+      key = self.hash(rect)
+      if ((key in seen) and (t + (t - seen[key]) <= g_time)):
+        period = t - seen[key]
+        cell_list = self.getcells(rect)
+        self.run(period)
+        t = t + period
+        if (self.getcells(rect) == cell_list):
+          # confirmed: the state repeats every period steps
+          self.run((g_time - t) % period)
+          break
+        # the hashes were equal but the states were not; start over
+        seen = {}
+        continue
+      seen[key] = t
+    # 
+    # returns NULL
+    # 
+  #
+#
+class GollyBackend(Backend):
+  """
+  Play the contests in Golly, with a persistent ContestContext.
+  """
+  #
+  # __init__(self, g) -- returns NULL
+  #
+  def __init__(self, g):
+    """
+    Make a backend for the Golly module g. The contest context is
+    made when the first toroid is prepared, so that a script that
+    only uses Golly for dialogs does not change the layers.
+    """
+    self.universe = g
+    self.context = None
+  #
+  # prepare(self, g_width, g_height) -- returns new_layer
+  #
+  def prepare(self, g_width, g_height):
+    """
+    Make an empty toroid of the given width and height, ready for a
+    new trial. Returns True if the toroid was newly set up, so that
+    the caller may want to set the magnification.
+    """
+    if (self.context is None):
+      self.context = ContestContext(self.universe)
+    return self.context.prepare(g_width, g_height)
+  #
+  # count_pops(self) -- returns [count1, count2]
+  #
+  def count_pops(self):
+    """
+    Count the populations of state 1 (red) and state 2 (blue)
+    """
+    # find the min and max of the Golly toroid coordinates
+    [g_xmin, g_xmax, g_ymin, g_ymax] = self.get_minmax()
+    #
+    # Get all of the living cells in the toroid with one call to Golly.
+    # Immigration has three states, so this is a multi-state cell list,
+    # [x1, y1, state1, x2, y2, state2, ...], possibly with a padding 0
+    # at the end.
+    #
+    cell_list = self.universe.getcells([g_xmin, g_ymin, \
+      g_xmax - g_xmin, g_ymax - g_ymin])
+    num_cells = len(cell_list) // 3
+    states = np.array(cell_list[:(3 * num_cells)], dtype=np.int64)[2::3]
+    #
+    # Tally the states.
+    #
+    tally = np.bincount(states, minlength=3)
+    count1 = int(tally[1])
+    count2 = int(tally[2])
+    #
+    return [count1, count2]
+  #
+#
+class NumpyBackend(Backend):
+  """
+  Play the contests one at a time in a headless Toroid.
+  """
+  #
+  # __init__(self, toroid) -- returns NULL
+  #
+  def __init__(self, toroid):
+    """
+    Make a backend for the given headless Toroid.
+    """
+    self.universe = toroid
+  #
+  # prepare(self, g_width, g_height) -- returns new_layer
+  #
+  def prepare(self, g_width, g_height):
+    """
+    Make an empty toroid of the given width and height. The headless
+    universe is cheap to set up from scratch, so it is always new.
+    """
+    rule_name = "Immigration"
+    self.universe.setrule(rule_name + ":T" + str(g_width) + "," + \
+      str(g_height))
+    return True
+  #
+  # count_pops(self) -- returns [count1, count2]
+  #
+  def count_pops(self):
+    """
+    Count the populations of state 1 (red) and state 2 (blue)
+    """
+    # the headless universe counts its own cells, much faster
+    return self.universe.count_pops()
+  #
+#
+class BatchBackend(NumpyBackend):
+  """
+  Like NumpyBackend, but lists of contests are stacked and played
+  together (see run_batch() in model_engine.py).
+  """
+  batch = True
+  #
+  # run_batch(self, grids, g_time) -- returns final_grids
+  #
+  def run_batch(self, grids, g_time):
+    """
+    Run a stack of toroids, indexed by [k][x][y], for g_time time
+    steps, stopping each one early if early_stop_flag is 1.
+    """
+    if (mparam.early_stop_flag == 1):
+      return mengine.run_batch(grids, g_time, mparam.early_stop_interval)
+    else:
+      return mengine.run_batch(grids, g_time, 0)
+  #
+#
 #
 #
@@ -0,0 +1,801 @@
+"""
+Model Engine
+
+A headless simulator for the Immigration Game, so that contests
+can be run without Golly.
+"""
+import numpy as np
+import itertools
+import os
+import re
+import sys
+"""
+Compile the rule table for the Immigration Game
+"""
+#
+# The rule is read from the @TABLE section of Immigration.rule, so that
+# the file used by Golly is the only statement of the rule. The table
+# uses permute symmetry, so the next state of a cell only depends on
+# its own state and the number of neighbours in each state. The table
+# is compiled into a lookup table, indexed by [centre state][number of
+# state 1 neighbours][number of state 2 neighbours].
+#
+# read_rule_table(rule_path) -- returns [n_states, variables, transitions]
+#
+def read_rule_table(rule_path):
+  """
+  Read the @TABLE section of a Golly rule file. The variables are a
+  map from each variable name to its list of states. Each transition
+  is a list of ten entries, C,N,NE,E,SE,S,SW,W,NW,C', where an entry
+  is either a state (an integer) or a variable name (a string).
+  """
+  rule_handle = open(rule_path, "r")
+  lines = rule_handle.read().splitlines()
+  rule_handle.close()
+  n_states = 0
+  neighbourhood = ""
+  symmetries = ""
+  variables = {}
+  transitions = []
+  in_table = False
+  for line in lines:
+    # remove comments and white space
+    line = line.split("#")[0].strip()
+    if (line == ""):
+      continue
+    if (line.startswith("@")):
+      in_table = (line == "@TABLE")
+      continue
+    if (not in_table):
+      continue
+    if (line.startswith("n_states:")):
+      n_states = int(line[len("n_states:"):])
+    elif (line.startswith("neighborhood:")):
+      neighbourhood = line[len("neighborhood:"):].strip()
+    elif (line.startswith("symmetries:")):
+      symmetries = line[len("symmetries:"):].strip()
+    elif (line.startswith("var ")):
+      # var a={1,2} -- the members may be states or earlier variables
+      [name, members] = line[len("var "):].split("=")
+      states = []
+      for member in members.strip().strip("{}").split(","):
+        member = member.strip()
+        if (member in variables):
+          states.extend(variables[member])
+        else:
+          states.append(int(member))
+      variables[name.strip()] = states
+    else:
+      # a transition, either 0,a,1,1,0,0,0,0,0,1 or 0a11000001
+      if ("," in line):
+        entries = line.split(",")
+      else:
+        entries = list(line)
+      transition = []
+      for entry in entries:
+        entry = entry.strip()
+        if (entry in variables):
+          transition.append(entry)
+        else:
+          transition.append(int(entry))
+      transitions.append(transition)
+  # the lookup table only covers tables like Immigration.rule
+  assert neighbourhood == "Moore"
+  assert symmetries == "permute"
+  for transition in transitions:
+    assert len(transition) == 10
+  return [n_states, variables, transitions]
+#
+# compile_rule(rule_path) -- returns rule_table
+#
+def compile_rule(rule_path):
+  """
+  Compile the rule table in the given rule file into a lookup table,
+  rule_table, where rule_table[c][n1][n2] is the next state of a cell
+  in state c with n1 neighbours in state 1 and n2 neighbours in state 2.
+  As in Golly, a variable that occurs more than once in a transition
+  has the same state each time, the first transition that matches a
+  cell is used, and a cell that matches no transition is unchanged.
+  """
+  [n_states, variables, transitions] = read_rule_table(rule_path)
+  # the neighbours are counted for states 1 and 2 only
+  assert n_states == 3
+  rule_table = np.zeros((n_states, 9, 9), dtype=np.int8)
+  for centre in range(n_states):
+    rule_table[centre] = centre
+  matched = np.zeros((n_states, 9, 9), dtype=bool)
+  for transition in transitions:
+    # the distinct variables in the transition, in order
+    names = []
+    for entry in transition[:9]:
+      if ((entry in variables) and (entry not in names)):
+        names.append(entry)
+    # the result may only use variables that are bound by the inputs
+    if (transition[9] in variables):
+      assert transition[9] in names
+    # try every binding of the variables to states
+    choices = []
+    for name in names:
+      choices.append(variables[name])
+    for binding in itertools.product(*choices):
+      states = []
+      for entry in transition:
+        if (entry in names):
+          states.append(binding[names.index(entry)])
+        else:
+          states.append(entry)
+      centre = states[0]
+      num_1 = states[1:9].count(1)
+      num_2 = states[1:9].count(2)
+      if (not matched[centre][num_1][num_2]):
+        rule_table[centre][num_1][num_2] = states[9]
+        matched[centre][num_1][num_2] = True
+  return rule_table
+#
+# the compiled Immigration Game
+#
+rule_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), \
+  "Immigration.rule")
+RULE_TABLE = compile_rule(rule_path)
+# the same table as a flat vector, for faster lookups
+RULE_LOOKUP = RULE_TABLE.ravel()
+"""
+Simulate the Immigration Game on a toroid with NumPy
+"""
+#
+# Note: as in model_classes.py, the grid is stored as a matrix indexed
+# by [x][y], where x is the horizontal Golly coordinate and y is the
+# vertical Golly coordinate. The cells have the same states as in
+# Immigration.rule: 0 = dead (white), 1 = red, 2 = blue.
+#
+# count_neighbours(plane) -- returns counts
+#
+def count_neighbours(plane):
+  """
+  Given a matrix of zeros and ones, count the number of ones in
+  the Moore neighbourhood (the eight surrounding cells) of each
+  cell. The edges of the matrix wrap around, as in a toroid. The
+  matrix may also be a stack of matrices, indexed by [k][x][y],
+  in which case each matrix in the stack is a separate toroid.
+  """
+  # sum each cell with the cells above and below it
+  column_sums = plane + np.roll(plane, 1, axis=-2) + \
+    np.roll(plane, -1, axis=-2)
+  # sum the column sums to the left and right, then remove the centre
+  counts = column_sums + np.roll(column_sums, 1, axis=-1) + \
+    np.roll(column_sums, -1, axis=-1) - plane
+  return counts
+#
+# immigration_step(grid) -- returns new_grid
+#
+def immigration_step(grid):
+  """
+  Run the Immigration Game for one time step on the given toroidal
+  grid and return the new grid. The next state of each cell is looked
+  up in RULE_TABLE, the rule compiled from Immigration.rule. Given a
+  stack of grids, indexed by [k][x][y], all of the grids in the stack
+  are run together.
+  """
+  red = (grid == 1).view(np.uint8)
+  blue = (grid == 2).view(np.uint8)
+  num_red = count_neighbours(red)
+  num_blue = count_neighbours(blue)
+  # the position of [grid][num_red][num_blue] in the flattened table;
+  # at most 2 * 81 + 8 * 9 + 8 = 242, so it fits in uint8
+  index = (grid.view(np.uint8) * 81) + (num_red * 9) + num_blue
+  return RULE_LOOKUP.take(index)
+#
+# Active regions: early in a contest, the two seeds occupy a small part
+# of the toroid, and the living cells can only spread by one cell per
+# time step. The functions below find a bounding box for the living
+# cells of each colour (allowing for wrap-around), widen it by the
+# number of steps to be run, and run only the cells in the boxes. The
+# boxes are found again every active_steps time steps. When the boxes
+# cover more than max_active_fraction of the toroid, the living cells
+# have spread out, and the whole toroid is run.
+#
+active_steps = 16
+max_active_fraction = 0.3
+#
+# live_span(occupied) -- returns [start, length] or None
+#
+def live_span(occupied):
+  """
+  Given a vector of booleans that wraps around, find the shortest
+  circular interval that contains all of the True entries, as the
+  index of its first entry and its length. Returns None if there
+  are no True entries.
+  """
+  size = len(occupied)
+  indices = np.nonzero(occupied)[0]
+  if (len(indices) == 0):
+    return None
+  # distance from each True entry to the next one, wrapping around
+  gaps = np.diff(np.append(indices, indices[0] + size))
+  # the interval is everything except the largest gap
+  largest = np.argmax(gaps)
+  start = int(indices[(largest + 1) % len(indices)])
+  length = int(size - gaps[largest] + 1)
+  return [start, length]
+#
+# overlap(span1, span2, size) -- returns True or False
+#
+def overlap(span1, span2, size):
+  """
+  Check whether two circular intervals [start, length] overlap.
+  """
+  [start1, length1] = span1
+  [start2, length2] = span2
+  return (((start2 - start1) % size) < length1) or \
+    (((start1 - start2) % size) < length2)
+#
+# active_box(plane, ring) -- returns [xspan, yspan] or None
+#
+def active_box(plane, ring):
+  """
+  Find the box of cells that may change in the next ring steps, given
+  the matrix of living cells, plane: the bounding box of the living
+  cells, widened by ring cells on every side. Each side of the box is
+  a circular interval [start, length]; a side that would wrap all the
+  way around the toroid is the whole side, [0, size]. Returns None if
+  nothing lives.
+  """
+  [width, height] = plane.shape
+  xspan = live_span(plane.any(axis=1))
+  if (xspan is None):
+    return None
+  yspan = live_span(plane.any(axis=0))
+  box = []
+  for [[start, length], size] in [[xspan, width], [yspan, height]]:
+    if (length + (2 * ring) >= size):
+      box.append([0, size])
+    else:
+      box.append([(start - ring) % size, length + (2 * ring)])
+  return box
+#
+# active_run(grid, num_steps) -- returns [new_grid, spread]
+#
+def active_run(grid, num_steps):
+  """
+  Like running immigration_step() num_steps times, but only run the
+  active boxes of the two colours (see active_box()). Each box is run
+  as a small toroid by itself: its edge cells stay dead until the last
+  step, so wrapping around the box gives the same neighbours as the
+  real toroid. If the boxes of the two colours do not overlap, then
+  neither colour can reach a neighbour of the other colour within the
+  steps, so the boxes can be run separately. Otherwise, they are merged
+  into one box for all living cells. If the boxes grow too large, the
+  whole toroid is run for the remaining steps, and spread is True.
+  """
+  [width, height] = grid.shape
+  step = 0
+  while (step < num_steps):
+    ring = min(active_steps, num_steps - step)
+    red_box = active_box(grid == 1, ring)
+    blue_box = active_box(grid == 2, ring)
+    if ((red_box is not None) and (blue_box is not None) and \
+      overlap(red_box[0], blue_box[0], width) and \
+      overlap(red_box[1], blue_box[1], height)):
+      boxes = [active_box(grid != 0, ring)]
+    else:
+      boxes = []
+      for box in [red_box, blue_box]:
+        if (box is not None):
+          boxes.append(box)
+    # if the active area is large, run the whole toroid
+    area = 0
+    for [[xstart, xlength], [ystart, ylength]] in boxes:
+      area = area + (xlength * ylength)
+    if (area > max_active_fraction * width * height):
+      # the living cells have spread out; run the whole toroid for
+      # the remaining steps
+      for t in range(num_steps - step):
+        grid = immigration_step(grid)
+      return [grid, True]
+    else:
+      # run each box as a small toroid
+      grid = grid.copy()
+      for [[xstart, xlength], [ystart, ylength]] in boxes:
+        window = np.ix_((xstart + np.arange(xlength)) % width, \
+          (ystart + np.arange(ylength)) % height)
+        region = grid[window]
+        for t in range(ring):
+          region = immigration_step(region)
+        grid[window] = region
+    step = step + ring
+  return [grid, False]
+#
+# run_batch(grids, num_steps, interval) -- returns final_grids
+#
+def run_batch(grids, num_steps, interval):
+  """
+  Run a stack of toroidal grids, indexed by [k][x][y], for num_steps
+  time steps and return the stack of final grids.
+
+  If interval > 0, then every interval time steps, each game is checked
+  for extinction and for a state that repeats an earlier checked state.
+  An extinct game stays extinct. If a game repeats with period p, it
+  is confirmed by running p more steps and comparing the whole grid,
+  and then its final state is the state it reaches after another
+  (steps left) mod p steps. Either way, the final state is known early
+  and the game is removed from the stack, so the rest of the stack
+  runs faster. The final grids are exactly those of the full run.
+  """
+  final_grids = np.zeros_like(grids)
+  # the positions in the original stack of the games still running
+  active = np.arange(grids.shape[0])
+  # for each game, a map from the hash of a checked state to its step
+  seen = {}
+  for game in active:
+    seen[game] = {}
+  # step -> [game, period, state] for games to confirm at that step
+  confirm_steps = {}
+  # step -> games whose state at that step is their final state
+  final_steps = {}
+  t = 0
+  while ((t < num_steps) and (len(active) > 0)):
+    grids = immigration_step(grids)
+    t = t + 1
+    done = []
+    # confirm the repeats that were found one period ago
+    for [game, period, state] in confirm_steps.pop(t, []):
+      row = np.nonzero(active == game)[0][0]
+      if (grids[row].tobytes() == state):
+        steps_left = (num_steps - t) % period
+        if (steps_left == 0):
+          done.append(game)
+        else:
+          final_steps.setdefault(t + steps_left, []).append(game)
+      else:
+        # the hashes were equal but the states were not; start over
+        seen[game] = {}
+    # games that have reached their final state
+    done.extend(final_steps.pop(t, []))
+    # check the games for extinction and repeated states
+    if ((interval > 0) and (t % interval == 0) and (t < num_steps)):
+      alive = grids.reshape(len(active), -1).any(axis=1)
+      for row in range(len(active)):
+        game = active[row]
+        if (seen[game] is None):
+          continue # already waiting to confirm or to finish
+        if (not alive[row]):
+          done.append(game)
+          continue
+        state = grids[row].tobytes()
+        key = hash(state)
+        if (key in seen[game]):
+          period = t - seen[game][key]
+          if (t + period <= num_steps):
+            confirm_steps.setdefault(t + period, []).append( \
+              [game, period, state])
+            seen[game] = None
+        else:
+          seen[game][key] = t
+    # take the games that are done out of the stack
+    if (len(done) > 0):
+      is_done = np.in1d(active, done)
+      final_grids[active[is_done]] = grids[is_done]
+      grids = grids[~is_done]
+      active = active[~is_done]
+  #
+  final_grids[active] = grids
+  return final_grids
+"""
+Simulate the Immigration Game with bit-packed planes
+"""
+#
+# The bit-packed representation stores the toroid as two planes of bits,
+# "alive" (state 1 or 2) and "blue" (state 2). Each row x of the grid is
+# packed into ceil(height / 64) uint64 words, where bit b of word k is the
+# cell [x][64 * k + b]. With height_factor = 3.0, a seed up to 21 cells
+# wide fits the whole height of the toroid in a single word, so one step
+# takes a few dozen word operations per row. Bits past the height of the
+# toroid are padding and are always kept at zero.
+#
+# number of ones in each possible byte, for counting the ones in a plane
+POPCOUNT = np.array([bin(byte).count("1") for byte in range(256)], \
+  dtype=np.int64)
+#
+# half_adder(a, b) -- returns [sum_bit, carry_bit]
+#
+def half_adder(a, b):
+  """
+  Add two planes of bits, bit by bit.
+  """
+  return [a ^ b, a & b]
+#
+# full_adder(a, b, c) -- returns [sum_bit, carry_bit]
+#
+def full_adder(a, b, c):
+  """
+  Add three planes of bits, bit by bit.
+  """
+  a_xor_b = a ^ b
+  return [a_xor_b ^ c, (a & b) | (a_xor_b & c)]
+"""
+Make a class for bit-packed toroids.
+"""
+class BitBoard:
+  """
+  A toroid of Immigration Game cells, stored as two packed planes of
+  bits, "alive" and "blue", and updated with bitwise adders. The two
+  planes are stacked in one array, self.planes[0] = alive and
+  self.planes[1] = blue, so that each word operation updates both.
+  """
+  #
+  # __init__(self, cells) -- returns NULL
+  #
+  def __init__(self, cells):
+    """
+    Pack a matrix of cells (states 0, 1, 2), indexed by [x][y].
+    """
+    [self.width, self.height] = cells.shape
+    self.num_words = (self.height + 63) // 64
+    # weights of the 64 bits in a word
+    self.bit_values = np.uint64(1) << np.arange(64, dtype=np.uint64)
+    # mask of the valid bits in each word of a row (the rest is padding)
+    valid = np.zeros((1, self.num_words * 64), dtype=bool)
+    valid[0, :self.height] = True
+    self.mask = self.pack_bits(valid)[0]
+    self.planes = np.array([self.pack_bits(cells != 0), \
+      self.pack_bits(cells == 2)])
+  #
+  # pack_bits(self, plane) -- returns words
+  #
+  def pack_bits(self, plane):
+    """
+    Pack a matrix of zeros and ones into rows of uint64 words.
+    """
+    num_rows = plane.shape[0]
+    bits = np.zeros((num_rows, self.num_words * 64), dtype=np.uint64)
+    bits[:, :plane.shape[1]] = plane
+    bits = bits.reshape(num_rows, self.num_words, 64)
+    return np.bitwise_or.reduce(bits * self.bit_values, axis=2)
+  #
+  # unpack_bits(self, words) -- returns plane
+  #
+  def unpack_bits(self, words):
+    """
+    Unpack rows of uint64 words into a matrix of booleans.
+    """
+    bits = (words[:, :, np.newaxis] & self.bit_values) != 0
+    return bits.reshape(words.shape[0], -1)[:, :self.height]
+  #
+  # cells(self) -- returns cells
+  #
+  def cells(self):
+    """
+    Unpack the planes into a matrix of cells (states 0, 1, 2).
+    """
+    cells = self.unpack_bits(self.planes[0]).astype(np.int8)
+    cells[self.unpack_bits(self.planes[1])] = 2
+    return cells
+  #
+  # shift_up(self, words) -- returns shifted
+  #
+  def shift_up(self, words):
+    """
+    Shift each row by one cell along the y axis, so that cell [x][y]
+    of the result is cell [x][y - 1] of the given words (wrapping).
+    """
+    one = np.uint64(1)
+    shifted = words << one
+    # carry the top bit of each word into the next word
+    if (self.num_words > 1):
+      shifted[..., 1:] |= words[..., :-1] >> np.uint64(63)
+    # wrap the last cell of the row around to the first cell
+    top = self.height - 1
+    shifted[..., 0] |= (words[..., top // 64] >> np.uint64(top % 64)) & one
+    return shifted
+  #
+  # shift_down(self, words) -- returns shifted
+  #
+  def shift_down(self, words):
+    """
+    Shift each row by one cell along the y axis, so that cell [x][y]
+    of the result is cell [x][y + 1] of the given words (wrapping).
+    """
+    one = np.uint64(1)
+    shifted = words >> one
+    # carry the bottom bit of each word into the previous word
+    if (self.num_words > 1):
+      shifted[..., :-1] |= words[..., 1:] << np.uint64(63)
+    # wrap the first cell of the row around to the last cell
+    top = self.height - 1
+    shifted[..., top // 64] |= (words[..., 0] & one) << np.uint64(top % 64)
+    return shifted
+  #
+  # neighbours(self, words) -- returns [bit0, bit1, bit2, bit3]
+  #
+  def neighbours(self, words):
+    """
+    Count the ones in the Moore neighbourhood of each cell of the
+    given planes, as four planes of binary digits:
+    count = bit0 + 2 * bit1 + 4 * bit2 + 8 * bit3.
+    """
+    up = self.shift_up(words)
+    down = self.shift_down(words)
+    # the two cells above and below each cell, as a 2-bit number
+    [pair0, pair1] = half_adder(up, down)
+    # the cell and the cells above and below it, as a 2-bit number
+    [triple0, triple1] = full_adder(up, words, down)
+    # the triples in the rows to the left (x - 1) and right (x + 1),
+    # with the rows wrapped around
+    triple0 = np.concatenate((triple0[..., -1:, :], triple0, \
+      triple0[..., :1, :]), axis=-2)
+    triple1 = np.concatenate((triple1[..., -1:, :], triple1, \
+      triple1[..., :1, :]), axis=-2)
+    # add the three 2-bit numbers: the ones, then the twos
+    [bit0, carry_a] = full_adder(pair0, triple0[..., :-2, :], \
+      triple0[..., 2:, :])
+    [sum_b, carry_b] = full_adder(pair1, triple1[..., :-2, :], \
+      triple1[..., 2:, :])
+    [bit1, carry_c] = half_adder(sum_b, carry_a)
+    # the carries of the twos are fours
+    [bit2, bit3] = half_adder(carry_b, carry_c)
+    return [bit0, bit1, bit2, bit3]
+  #
+  # step(self) -- returns NULL
+  #
+  def step(self):
+    """
+    Run the Immigration Game for one time step.
+    """
+    [bit0, bit1, bit2, bit3] = self.neighbours(self.planes)
+    alive = self.planes[0]
+    blue = self.planes[1]
+    # 2 or 3 live neighbours: live cells survive
+    two_or_three = bit1[0] & ~(bit2[0] | bit3[0])
+    # exactly 3 live neighbours: dead cells are born
+    birth = two_or_three & bit0[0] & ~alive & self.mask
+    # a newborn cell is blue if at least 2 of its 3 live neighbours
+    # are blue; with at most 3 blue neighbours, that is bit1 of blue
+    self.planes = np.array([(alive & two_or_three) | birth, \
+      (blue & two_or_three) | (birth & bit1[1])])
+  #
+  # count_pops(self) -- returns [count1, count2]
+  #
+  def count_pops(self):
+    """
+    Count the populations of state 1 (red) and state 2 (blue).
+    """
+    num_alive = POPCOUNT[self.planes[0].view(np.uint8)].sum()
+    num_blue = POPCOUNT[self.planes[1].view(np.uint8)].sum()
+    return [int(num_alive - num_blue), int(num_blue)]
+  #
+"""
+Make a class for a headless Golly universe.
+"""
+class Toroid:
+  """
+  A headless stand-in for the Golly universe. It implements the
+  part of the Golly scripting interface that is used for running
+  contests (see score_pair() in model_functions.py), so that it can
+  be passed wherever the Golly module g is expected. Only bounded
+  toroidal Immigration universes are supported.
+  """
+  #
+  # __init__(self, engine) -- returns NULL
+  #
+  def __init__(self, engine = "numpy"):
+    """
+    Make an empty universe. The size is set later, with setrule().
+    The engine is "numpy" (one byte per cell) or "bitboard" (packed
+    bit-planes; see BitBoard).
+    """
+    assert engine in ["numpy", "bitboard"]
+    self.engine = engine
+    self.rule = "Immigration"
+    self.width = 0
+    self.height = 0
+    # Golly coordinates of the top left corner of the toroid
+    self.xmin = 0
+    self.ymin = 0
+    # the cells of the toroid, indexed by [x - xmin][y - ymin]
+    self.cells = np.zeros((0, 0), dtype=np.int8)
+    # with the "bitboard" engine, the bit-planes after run(); when this
+    # is not None, it is newer than self.cells (see sync_cells())
+    self.board = None
+    # with the "numpy" engine, True when the living cells have spread
+    # out too far for active_run() to help
+    self.spread = False
+  #
+  # Calls that only affect the Golly display have no effect here.
+  #
+  def setalgo(self, algo):
+    pass
+  def autoupdate(self, flag):
+    pass
+  def setmag(self, mag):
+    pass
+  def update(self):
+    pass
+  #
+  # show(self, message) -- returns NULL
+  #
+  def show(self, message):
+    """
+    There is no Golly status bar, so write the message to stdout.
+    """
+    sys.stdout.write(message)
+  #
+  # new(self, title) -- returns NULL
+  #
+  def new(self, title):
+    """
+    Set all cells to state 0. As in Golly, the rule is unchanged.
+    """
+    self.cells = np.zeros((self.width, self.height), dtype=np.int8)
+    self.board = None
+    self.spread = False
+  #
+  # sync_cells(self) -- returns NULL
+  #
+  def sync_cells(self):
+    """
+    If the bit-planes are newer than the cells, unpack them into the
+    cells. This is needed before the cells are read or written one
+    by one.
+    """
+    if (self.board is not None):
+      self.cells = self.board.cells()
+      self.board = None
+  #
+  # setrule(self, rule) -- returns NULL
+  #
+  def setrule(self, rule):
+    """
+    Set the rule and the size of the toroid. The rule must have the
+    form "Immigration:T<width>,<height>", as in score_pair().
+    """
+    rule_search = re.search(r'^Immigration:T(\d+),(\d+)$', rule)
+    assert rule_search, "Only toroidal Immigration rules are supported."
+    self.rule = rule
+    self.width = int(rule_search.group(1))
+    self.height = int(rule_search.group(2))
+    # same coordinate convention as Golly (see get_minmax())
+    self.xmin = - int(self.width / 2)
+    self.ymin = - int(self.height / 2)
+    self.new("")
+  #
+  # getrule(self) -- returns rule
+  #
+  def getrule(self):
+    return self.rule
+  #
+  # getwidth(self) -- returns width
+  #
+  def getwidth(self):
+    return self.width
+  #
+  # getheight(self) -- returns height
+  #
+  def getheight(self):
+    return self.height
+  #
+  # setcell(self, x, y, state) -- returns NULL
+  #
+  def setcell(self, x, y, state):
+    """
+    Set the cell at Golly coordinates (x, y) to the given state.
+    """
+    self.sync_cells()
+    self.cells[(x - self.xmin) % self.width][(y - self.ymin) % self.height] \
+      = state
+    self.spread = False
+  #
+  # getcell(self, x, y) -- returns state
+  #
+  def getcell(self, x, y):
+    """
+    Get the state of the cell at Golly coordinates (x, y).
+    """
+    self.sync_cells()
+    return int(self.cells[(x - self.xmin) % self.width] \
+      [(y - self.ymin) % self.height])
+  #
+  # putcells(self, cell_list) -- returns NULL
+  #
+  def putcells(self, cell_list):
+    """
+    Set the cells in a multi-state Golly cell list,
+    [x1, y1, state1, x2, y2, state2, ...], ignoring any padding.
+    """
+    self.sync_cells()
+    num_cells = len(cell_list) // 3
+    triples = np.array(cell_list[:(3 * num_cells)], dtype=np.int64)
+    triples = triples.reshape(num_cells, 3)
+    self.cells[(triples[:, 0] - self.xmin) % self.width, \
+      (triples[:, 1] - self.ymin) % self.height] = triples[:, 2]
+    self.spread = False
+  #
+  # get_region(self, rect) -- returns [xs, ys, region]
+  #
+  def get_region(self, rect):
+    """
+    Get the cells in the rectangle rect = [x, y, width, height], as a
+    matrix, along with the Golly coordinates of its rows and columns.
+    """
+    self.sync_cells()
+    [x, y, rect_width, rect_height] = rect
+    xs = np.arange(x, x + rect_width)
+    ys = np.arange(y, y + rect_height)
+    region = self.cells[np.ix_((xs - self.xmin) % self.width, \
+      (ys - self.ymin) % self.height)]
+    return [xs, ys, region]
+  #
+  # getcells(self, rect) -- returns cell_list
+  #
+  def getcells(self, rect):
+    """
+    Get the living cells in the rectangle rect = [x, y, width, height]
+    as a multi-state Golly cell list, [x1, y1, state1, ...], padded
+    with a 0 if needed to make the length odd.
+    """
+    if (len(rect) == 0):
+      return []
+    [xs, ys, region] = self.get_region(rect)
+    [region_xs, region_ys] = np.nonzero(region)
+    cell_list = np.column_stack((xs[region_xs], ys[region_ys], \
+      region[region_xs, region_ys])).ravel().tolist()
+    if ((len(cell_list) > 0) and (len(cell_list) % 2 == 0)):
+      cell_list.append(0)
+    return cell_list
+  #
+  # run(self, num_steps) -- returns NULL
+  #
+  def run(self, num_steps):
+    """
+    Run the Immigration Game for num_steps time steps.
+    """
+    if (self.engine == "bitboard"):
+      # keep the bit-planes until the cells are needed again
+      if (self.board is None):
+        self.board = BitBoard(self.cells)
+      for t in range(num_steps):
+        self.board.step()
+    elif (self.spread):
+      for t in range(num_steps):
+        self.cells = immigration_step(self.cells)
+    else:
+      [self.cells, self.spread] = active_run(self.cells, num_steps)
+  #
+  # empty(self) -- returns True or False
+  #
+  def empty(self):
+    """
+    Return True if all cells are in state 0.
+    """
+    if (self.board is not None):
+      return not self.board.planes[0].any()
+    return not self.cells.any()
+  #
+  # hash(self, rect) -- returns hash_value
+  #
+  def hash(self, rect):
+    """
+    Return an integer hash of the cells in the rectangle
+    rect = [x, y, width, height], for detecting repeated states.
+    """
+    # the bit-planes represent the whole toroid uniquely
+    if ((self.board is not None) and (rect[2] >= self.width) and \
+      (rect[3] >= self.height)):
+      return hash(self.board.planes.tobytes())
+    [xs, ys, region] = self.get_region(rect)
+    return hash(region.tobytes())
+  #
+  # count_pops(self) -- returns [count1, count2]
+  #
+  def count_pops(self):
+    """
+    Count the populations of state 1 (red) and state 2 (blue). This
+    replaces a call to getcell() for every cell in the toroid.
+    """
+    if (self.board is not None):
+      return self.board.count_pops()
+    count1 = int(np.count_nonzero(self.cells == 1))
+    count2 = int(np.count_nonzero(self.cells == 2))
+    return [count1, count2]
+  #
+#
+#
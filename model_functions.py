@@ -3,17 +3,64 @@ Model Functions
 
 Peter Turney, May 18, 2020
 """
-import golly as g
 import model_classes as mclass
 import model_parameters as mparam
+import model_engine as mengine
 import random as rand
 import numpy as np
-import copy
+import collections
+import hashlib
 import time
 import pickle
 import os
 import re
 import sys
+import multiprocessing
+"""
+Choose the simulation backend
+"""
+#
+# Backends for universes that were not made by make_backend(), such as
+# the Golly module that the compare_*.py scripts pass to score_pair(),
+# keyed by id(universe).
+#
+backends = {}
+#
+# get_backend(g) -- returns backend
+#
+def get_backend(g):
+  """
+  Given a backend (see Backend in model_classes.py), return it as it
+  is. Given the Golly module or a headless Toroid, return a backend
+  for it, the same backend each time.
+  """
+  if (isinstance(g, mclass.Backend)):
+    return g
+  if (id(g) not in backends):
+    if (isinstance(g, mengine.Toroid)):
+      backends[id(g)] = mclass.NumpyBackend(g)
+    else:
+      backends[id(g)] = mclass.GollyBackend(g)
+  return backends[id(g)]
+#
+# make_backend(contest_engine) -- returns backend
+#
+def make_backend(contest_engine):
+  """
+  Make the backend for the given contest_engine (see
+  model_parameters.py). Only the "golly" backend needs Golly.
+  """
+  if (contest_engine == "golly"):
+    import golly
+    return get_backend(golly)
+  elif (contest_engine == "batch"):
+    return mclass.BatchBackend(mengine.Toroid("numpy"))
+  else:
+    return mclass.NumpyBackend(mengine.Toroid(contest_engine))
+#
+# The backend for run_model.py.
+#
+g = make_backend(mparam.contest_engine)
 """
 Various functions for working with Golly
 """
@@ -74,16 +121,7 @@ def get_minmax(g):
   """
   Calculate the min and max of the Golly toroid coordinates
   """
-  # get height and width
-  g_xspan = g.getwidth()
-  g_yspan = g.getheight()
-  # calculate min and max
-  g_xmin = - int(g_xspan / 2)
-  g_xmax = g_xspan + g_xmin
-  g_ymin = - int(g_yspan / 2)
-  g_ymax = g_yspan + g_ymin
-  #
-  return [g_xmin, g_xmax, g_ymin, g_ymax]
+  return get_backend(g).get_minmax()
 #
 # count_pops(g) -- returns [count1, count2]
 #
@@ -91,21 +129,7 @@ def count_pops(g):
   """
   Count the populations of state 1 (red) and state 2 (blue)
   """
-  # find the min and max of the Golly toroid coordinates
-  [g_xmin, g_xmax, g_ymin, g_ymax] = get_minmax(g)
-  #
-  count1 = 0
-  count2 = 0
-  #
-  for x in range(g_xmin, g_xmax):
-    for y in range(g_ymin, g_ymax):
-      a = g.getcell(x, y)
-      if (a == 1):
-        count1 = count1 + 1
-      if (a == 2):
-        count2 = count2 + 1
-  #
-  return [count1, count2]
+  return get_backend(g).count_pops()
 #
 # initialize_population(pop_size, s_xspan, s_yspan, seed_density)
 # -- returns population
@@ -131,10 +155,14 @@ def initialize_population(pop_size, s_xspan, s_yspan, seed_density):
     seed.num_living = seed.count_ones()
     # Set the position of the new seed in the population array.
     seed.address = i 
+    # Share the cells with identical seeds (see intern_seed()).
+    intern_seed(seed)
     # Add the seed to the population.
     population.append(seed) 
     #
-  return population
+  # The population keeps the histories and similarities of the seeds
+  # in matrices (see Population in model_classes.py).
+  return mclass.Population(population)
 #
 # dimensions(s1, s2, width_factor, height_factor, time_factor)
 # -- returns [g_width, g_height, g_time]
@@ -167,6 +195,23 @@ def dimensions(s1, s2, width_factor, height_factor, time_factor):
   #
   return [g_width, g_height, g_time]
 #
+# prepare_toroid(g, g_width, g_height) -- returns NULL
+#
+def prepare_toroid(g, g_width, g_height):
+  """
+  Make an empty Immigration toroid of the given width and height in
+  the backend g, ready for a new trial. In Golly, the universes are
+  kept between trials, so the rule and magnification are only set
+  when a new toroid size is needed.
+  """
+  g = get_backend(g)
+  if (g.prepare(g_width, g_height)):
+    # set magnification for Golly viewer
+    g.setmag(set_mag(g))
+  # 
+  # returns NULL
+  # 
+#
 # score_pair(g, seed1, seed2, width_factor, height_factor, \
 #   time_factor, num_trials) -- returns [score1, score2]
 #
@@ -176,14 +221,30 @@ def score_pair(g, seed1, seed2, width_factor, height_factor, \
   Put seed1 and seed2 into the Immigration Game g and see which 
   one wins and which one loses. Note that this function does
   not update the histories of the seeds. For updating histories,
-  use update_history().
+  use update_history(). The contest is played with play_pair(),
+  unless it is in the contest cache (see cached_scores()).
   """
+  [scores] = score_batch(g, [[seed1, seed2]], width_factor, \
+    height_factor, time_factor, num_trials)
+  return scores
+#
+# play_pair(g, seed1, seed2, width_factor, height_factor, \
+#   time_factor, num_trials) -- returns [wins1, wins2, ties]
+#
+def play_pair(g, seed1, seed2, width_factor, height_factor, \
+  time_factor, num_trials):
+  """
+  Play num_trials trials of a contest between seed1 and seed2 in the
+  Immigration Game g, and count the wins of each seed and the ties.
+  """
+  g = get_backend(g)
   #
-  # Make copies of the original two seeds, so that the following
-  # manipulations do not change the originals.
+  # Make light copies of the original two seeds (see view() in
+  # model_classes.py), so that the following manipulations do not
+  # change the originals.
   #
-  s1 = copy.deepcopy(seed1)
-  s2 = copy.deepcopy(seed2)
+  s1 = seed1.view()
+  s2 = seed2.view()
   #
   # Check the number of living cells in the seeds. If the number
   # is zero, it is probably a mistake. The number is initially
@@ -195,10 +256,9 @@ def score_pair(g, seed1, seed2, width_factor, height_factor, \
   assert s1.num_living > 0
   assert s2.num_living > 0
   #
-  # Initialize scores
+  # Initialize the counts of wins and ties
   #
-  score1 = 0.0
-  score2 = 0.0
+  counts = [0, 0, 0]
   #
   # Run several trials with different rotations and locations.
   #
@@ -213,10 +273,6 @@ def score_pair(g, seed1, seed2, width_factor, height_factor, \
     #
     s2.red2blue()
     #
-    # Rule file
-    #
-    rule_name = "Immigration"
-    #
     # Set toroidal universe of height yspan and width xspan
     # Base the s1ze of the universe on the s1zes of the seeds
     #
@@ -225,21 +281,14 @@ def score_pair(g, seed1, seed2, width_factor, height_factor, \
     [g_width, g_height, g_time] = dimensions(s1, s2, \
       width_factor, height_factor, time_factor)
     #
-    # set algorithm -- "HashLife" or "QuickLife"
+    # Make an empty toroid of this size (see prepare_toroid())
     #
-    g.setalgo("QuickLife") # use "HashLife" or "QuickLife"
-    g.autoupdate(False) # do not update the view unless requested
-    g.new(rule_name) # initialize cells to state 0
-    g.setrule(rule_name + ":T" + str(g_width) + "," + str(g_height)) # make a toroid
+    prepare_toroid(g, g_width, g_height)
     #
     # Find the min and max of the Golly toroid coordinates
     #
     [g_xmin, g_xmax, g_ymin, g_ymax] = get_minmax(g)
     #
-    # Set magnification for Golly viewer
-    #
-    g.setmag(set_mag(g))
-    #
     # Randomly place seed s1 somewhere in the left s1de of the toroid
     #
     s1.insert(g, g_xmin, -1, g_ymin, g_ymax)
@@ -256,7 +305,7 @@ def score_pair(g, seed1, seed2, width_factor, height_factor, \
     # whereas generations in evolution correspond to the reproduction
     # of a genotype.
     #
-    g.run(g_time) # run the Game of Life for g_time time steps
+    run_contest(g, g_time) # run the Game of Life for g_time time steps
     g.update() # need to update Golly to get counts
     #
     # Count the populations of the two colours. State 1 = red = seed1.
@@ -278,34 +327,670 @@ def score_pair(g, seed1, seed2, width_factor, height_factor, \
     # s1.num_living = initial number of living cells in s1
     # s2.num_living = initial number of living cells in s2
     #
-    if (s1.num_living < count1):
-      count1 = count1 - s1.num_living
-    else:
-      count1 = 0
-    #
-    if (s2.num_living < count2):
-      count2 = count2 - s2.num_living
-    else:
-      count2 = 0
-    #
-    # Now we are ready to determine the winner.
-    #
-    if (count1 > count2):
-      score1 = score1 + 1.0
-    elif (count2 > count1):
-      score2 = score2 + 1.0
-    else:
-      score1 = score1 + 0.5
-      score2 = score2 + 0.5
+    [trial1, trial2] = trial_scores(s1, s2, count1, count2)
+    counts = add_trial(counts, trial1, trial2)
     #
   #
-  # Normalize the scores
+  return counts
+#
+# run_contest(g, g_time) -- returns NULL
+#
+def run_contest(g, g_time):
+  """
+  Run the Game of Life in g for g_time time steps, stopping early
+  when the final state is known (see Backend.run_contest() in
+  model_classes.py).
+  """
+  get_backend(g).run_contest(g_time)
+  # 
+  # returns NULL
+  # 
+#
+# trial_scores(s1, s2, count1, count2) -- returns [score1, score2]
+#
+def trial_scores(s1, s2, count1, count2):
+  """
+  Given the final counts of red cells (count1, from s1) and blue
+  cells (count2, from s2) in one trial of a contest, decide the
+  winner. The winner scores 1.0 and the loser 0.0; a tie scores
+  0.5 each. The counts are adjusted for the initial numbers of
+  living cells in the seeds (see play_pair()).
+  """
+  if (s1.num_living < count1):
+    count1 = count1 - s1.num_living
+  else:
+    count1 = 0
   #
-  score1 = score1 / num_trials
-  score2 = score2 / num_trials
+  if (s2.num_living < count2):
+    count2 = count2 - s2.num_living
+  else:
+    count2 = 0
   #
+  if (count1 > count2):
+    return [1.0, 0.0]
+  elif (count2 > count1):
+    return [0.0, 1.0]
+  else:
+    return [0.5, 0.5]
+#
+# add_trial(counts, trial1, trial2) -- returns counts
+#
+def add_trial(counts, trial1, trial2):
+  """
+  Add the scores of one trial (see trial_scores()) to the counts of
+  wins and ties, counts = [wins1, wins2, ties].
+  """
+  [wins1, wins2, ties] = counts
+  if (trial1 > trial2):
+    wins1 = wins1 + 1
+  elif (trial2 > trial1):
+    wins2 = wins2 + 1
+  else:
+    ties = ties + 1
+  return [wins1, wins2, ties]
+#
+# contest_scores(counts) -- returns [score1, score2]
+#
+def contest_scores(counts):
+  """
+  Given the counts of wins and ties in the trials of a contest, 
+  counts = [wins1, wins2, ties], return the average scores of the
+  two seeds over the trials. A win scores 1.0 and a tie 0.5.
+  """
+  [wins1, wins2, ties] = counts
+  num_trials = float(wins1 + wins2 + ties)
+  score1 = (wins1 + (0.5 * ties)) / num_trials
+  score2 = (wins2 + (0.5 * ties)) / num_trials
   return [score1, score2]
 #
+# rotate_cells(cells, rotation, flip) -- returns rotated_cells
+#
+def rotate_cells(cells, rotation, flip):
+  """
+  Rotate the cells of a seed by 90 degrees * rotation and, if flip
+  is 1, flip them upside down, as in random_rotate().
+  """
+  rotated_cells = np.rot90(cells, rotation)
+  if (flip == 1):
+    rotated_cells = np.flipud(rotated_cells)
+  return rotated_cells
+#
+# random_job(seed1, seed2, width_factor, height_factor, time_factor)
+# -- returns job
+#
+def random_job(seed1, seed2, width_factor, height_factor, time_factor):
+  """
+  Randomly choose the rotations and the locations of seed1 and seed2
+  for one trial of a contest, in the same way as play_pair(), and
+  return them as a job for count_batch():
+
+    job = [seed1, seed2, rotation, placement]
+    rotation = [rotation1, flip1, rotation2, flip2]
+    placement = [g_xstart1, g_ystart1, g_xstart2, g_ystart2]
+
+  where (g_xstart, g_ystart) are the Golly coordinates of the first
+  cell of each rotated seed.
+  """
+  rotation = [rand.randrange(0, 4, 1), rand.randrange(0, 2, 1), \
+    rand.randrange(0, 4, 1), rand.randrange(0, 2, 1)]
+  s1_cells = rotate_cells(seed1.cells, rotation[0], rotation[1])
+  s2_cells = rotate_cells(seed2.cells, rotation[2], rotation[3])
+  # the size of the toroid does not depend on the rotations
+  [g_width, g_height, g_time] = dimensions(seed1, seed2, \
+    width_factor, height_factor, time_factor)
+  # the min and max of the toroid coordinates, as in get_minmax()
+  g_xmin = - int(g_width / 2)
+  g_xmax = g_width + g_xmin
+  g_ymin = - int(g_height / 2)
+  g_ymax = g_height + g_ymin
+  # s1 goes in the left side and s2 in the right side, as in insert()
+  step = 1
+  placement = [ \
+    rand.randrange(g_xmin, -1 - s1_cells.shape[0], step), \
+    rand.randrange(g_ymin, g_ymax - s1_cells.shape[1], step), \
+    rand.randrange(+1, g_xmax - s2_cells.shape[0], step), \
+    rand.randrange(g_ymin, g_ymax - s2_cells.shape[1], step)]
+  return [seed1, seed2, rotation, placement]
+#
+# count_batch(g, jobs, width_factor, height_factor, time_factor) 
+# -- returns counts
+#
+def count_batch(g, jobs, width_factor, height_factor, time_factor):
+  """
+  Play the Immigration Game for a list of jobs (see random_job())
+  with the batch backend g. Jobs with the same toroid size are
+  stacked in one array and run together, up to mparam.batch_size
+  jobs at a time. Returns a list with [count1, count2] for each job,
+  the populations of red (seed1) and blue (seed2) at the end of the 
+  game, as from count_pops().
+  """
+  #
+  # Group the jobs by the size of their toroids.
+  #
+  groups = {}
+  for k in range(len(jobs)):
+    [seed1, seed2, rotation, placement] = jobs[k]
+    size = tuple(dimensions(seed1, seed2, width_factor, \
+      height_factor, time_factor))
+    if (size in groups):
+      groups[size].append(k)
+    else:
+      groups[size] = [k]
+  #
+  # Run each group, in chunks of at most batch_size jobs.
+  #
+  counts = [None] * len(jobs)
+  batch_size = mparam.batch_size
+  for size in groups:
+    [g_width, g_height, g_time] = size
+    g_xmin = - int(g_width / 2)
+    g_ymin = - int(g_height / 2)
+    group = groups[size]
+    for first in range(0, len(group), batch_size):
+      chunk = group[first:(first + batch_size)]
+      grids = np.zeros((len(chunk), g_width, g_height), dtype=np.int8)
+      # insert the seeds, with seed2 switched from red to blue
+      for c in range(len(chunk)):
+        [seed1, seed2, rotation, placement] = jobs[chunk[c]]
+        s1_cells = rotate_cells(seed1.cells, rotation[0], rotation[1])
+        s2_cells = rotate_cells(seed2.cells, rotation[2], rotation[3])
+        x1 = placement[0] - g_xmin
+        y1 = placement[1] - g_ymin
+        x2 = placement[2] - g_xmin
+        y2 = placement[3] - g_ymin
+        grids[c, x1:(x1 + s1_cells.shape[0]), \
+          y1:(y1 + s1_cells.shape[1])] = s1_cells
+        grids[c, x2:(x2 + s2_cells.shape[0]), \
+          y2:(y2 + s2_cells.shape[1])] = 2 * s2_cells
+      # run all of the games in the chunk together
+      grids = g.run_batch(grids, g_time)
+      # count the populations of red and blue in each game
+      counts1 = np.sum(grids == 1, axis=(1, 2))
+      counts2 = np.sum(grids == 2, axis=(1, 2))
+      for c in range(len(chunk)):
+        counts[chunk[c]] = [int(counts1[c]), int(counts2[c])]
+  #
+  return counts
+#
+# score_batch(g, pairs, width_factor, height_factor, time_factor, \
+#   num_trials) -- returns scores
+#
+def score_batch(g, pairs, width_factor, height_factor, time_factor, \
+  num_trials):
+  """
+  Like score_pair(), but for a list of pairs of seeds, [seed1, seed2],
+  which are played with play_batch(). Returns a list with
+  [score1, score2] for each pair.
+  """
+  return cached_scores(g, pairs, width_factor, height_factor, \
+    time_factor, num_trials, play_batch)
+#
+# play_batch(g, pairs, width_factor, height_factor, time_factor, \
+#   trials) -- returns counts
+#
+def play_batch(g, pairs, width_factor, height_factor, time_factor, \
+  trials):
+  """
+  Like play_pair(), but for a list of pairs of seeds, [seed1, seed2],
+  with trials[p] trials for the p-th pair. The pairs are all played
+  together with count_batch() if g is a batch backend, or one at a
+  time with play_pair() if not. Returns a list with [wins1, wins2,
+  ties] for each pair.
+  """
+  g = get_backend(g)
+  if (not g.batch):
+    counts = []
+    for p in range(len(pairs)):
+      [seed1, seed2] = pairs[p]
+      counts.append(play_pair(g, seed1, seed2, width_factor, \
+        height_factor, time_factor, trials[p]))
+    return counts
+  #
+  jobs = []
+  for p in range(len(pairs)):
+    [seed1, seed2] = pairs[p]
+    # see the comment on num_living in play_pair()
+    assert seed1.num_living > 0
+    assert seed2.num_living > 0
+    for trial in range(trials[p]):
+      jobs.append(random_job(seed1, seed2, width_factor, \
+        height_factor, time_factor))
+  job_counts = count_batch(g, jobs, width_factor, height_factor, \
+    time_factor)
+  counts = []
+  first = 0
+  for p in range(len(pairs)):
+    [seed1, seed2] = pairs[p]
+    pair_counts = [0, 0, 0]
+    for trial in range(trials[p]):
+      [count1, count2] = job_counts[first + trial]
+      [trial1, trial2] = trial_scores(seed1, seed2, count1, count2)
+      pair_counts = add_trial(pair_counts, trial1, trial2)
+    counts.append(pair_counts)
+    first = first + trials[p]
+  return counts
+"""
+Share out contests among worker processes
+"""
+#
+# The pool of worker processes (see num_workers in model_parameters.py),
+# made when it is first needed. Each worker has its own copy of the
+# backend g, made before the pool was forked.
+#
+pool = None
+#
+# get_pool() -- returns pool
+#
+def get_pool():
+  """
+  Get the pool of worker processes, making it if necessary.
+  """
+  global pool
+  if (pool is None):
+    # the workers are forked from the main process (see num_workers)
+    assert sys.platform != "win32"
+    pool = multiprocessing.Pool(mparam.num_workers)
+  return pool
+#
+# contest_seed(seed) -- returns light_seed
+#
+def contest_seed(seed):
+  """
+  Make a light copy of a seed, with everything that a contest needs
+  but without the history and similarities, which are as long as the
+  population. The light copy is cheaper to send to a worker process.
+  """
+  light_seed = seed.view()
+  light_seed.detach()
+  return light_seed
+#
+# play_task(task) -- returns counts
+#
+def play_task(task):
+  """
+  Run play_batch() in a worker process for one task from
+  play_parallel(). The task includes a seed for the random number
+  generator, so that the rotations and locations of the seeds do not
+  depend on which worker runs the task.
+  """
+  [task_seed, pairs, width_factor, height_factor, time_factor, \
+    trials] = task
+  rand.seed(task_seed)
+  return play_batch(g, pairs, width_factor, height_factor, \
+    time_factor, trials)
+#
+# play_parallel(g, pairs, width_factor, height_factor, time_factor, \
+#   trials) -- returns counts
+#
+def play_parallel(g, pairs, width_factor, height_factor, time_factor, \
+  trials):
+  """
+  Like play_batch(), but the pairs are split into tasks that are
+  shared out among the worker processes in the pool. With only one
+  worker, this is the same as play_batch().
+  """
+  num_workers = mparam.num_workers
+  if ((num_workers <= 1) or (len(pairs) == 0)):
+    return play_batch(g, pairs, width_factor, height_factor, \
+      time_factor, trials)
+  #
+  # Use light copies of the seeds. Each seed is copied once, so it is
+  # only sent once with each task that uses it.
+  #
+  light_seeds = {}
+  light_pairs = []
+  for [seed1, seed2] in pairs:
+    for seed in [seed1, seed2]:
+      if (id(seed) not in light_seeds):
+        light_seeds[id(seed)] = contest_seed(seed)
+    light_pairs.append([light_seeds[id(seed1)], light_seeds[id(seed2)]])
+  #
+  # A few tasks for each worker, to even out the load.
+  #
+  num_tasks = min(len(pairs), 4 * num_workers)
+  task_size = int(np.ceil(len(pairs) / float(num_tasks)))
+  tasks = []
+  for first in range(0, len(pairs), task_size):
+    task_seed = rand.getrandbits(32)
+    tasks.append([task_seed, light_pairs[first:(first + task_size)], \
+      width_factor, height_factor, time_factor, \
+      trials[first:(first + task_size)]])
+  #
+  counts = []
+  for task_counts in get_pool().map(play_task, tasks):
+    counts.extend(task_counts)
+  return counts
+#
+# score_parallel(g, pairs, width_factor, height_factor, time_factor, \
+#   num_trials) -- returns scores
+#
+def score_parallel(g, pairs, width_factor, height_factor, time_factor, \
+  num_trials):
+  """
+  Like score_batch(), but the pairs are played with play_parallel(),
+  so they are shared out among the worker processes in the pool.
+  """
+  return cached_scores(g, pairs, width_factor, height_factor, \
+    time_factor, num_trials, play_parallel)
+"""
+Canonical forms of seeds
+"""
+#
+# A seed and its 7 other rotations and flips (see random_rotate() in
+# model_classes.py) play the same games, because play_pair() and
+# random_job() rotate and flip the seeds at random. The canonical
+# cells of a seed are the same for all 8 of them. 
+#
+# The seed table maps the cells of a seed (see cells_key()) to a
+# shared, read-only array of cells and the key of the canonical cells
+# (see seed_key()). The canonical cells are stored once, and the cells
+# of each rotation and flip of them are a view of the canonical array
+# (see rotate_cells()). So seeds that are interned (see intern_seed())
+# share one array of cells if they are the same up to rotation and
+# flipping, and they share one key in the contest cache. When the
+# table is full, the least recently used entries are dropped; the
+# seeds that were interned keep their cells.
+#
+seed_table = collections.OrderedDict()
+#
+# cells_key(cells) -- returns key
+#
+def cells_key(cells):
+  """
+  Make a string from the shape and the contents of an array of cells.
+  Two arrays have the same string if and only if they are equal.
+  """
+  cells = np.ascontiguousarray(cells, dtype=np.uint8)
+  return str(cells.shape) + cells.tostring()
+#
+# canonical_form(cells) -- returns [canonical_cells, rotation, flip]
+#
+def canonical_form(cells):
+  """
+  Of the 8 rotations and flips of the cells of a seed (see 
+  rotate_cells()), find the one with the smallest cells_key(), and
+  the rotation and flip that give it.
+  """
+  best_form = [cells, 0, 0]
+  best_key = cells_key(cells)
+  for rotation in range(4):
+    for flip in range(2):
+      rotated_cells = rotate_cells(cells, rotation, flip)
+      key = cells_key(rotated_cells)
+      if (key < best_key):
+        best_form = [rotated_cells, rotation, flip]
+        best_key = key
+  return best_form
+#
+# canonical_cells(cells) -- returns canonical_cells
+#
+def canonical_cells(cells):
+  """
+  Of the 8 rotations and flips of the cells of a seed (see 
+  rotate_cells()), return the one with the smallest cells_key().
+  """
+  [best_cells, rotation, flip] = canonical_form(cells)
+  return best_cells
+#
+# table_entry(cells_string) -- returns entry or None
+#
+def table_entry(cells_string):
+  """
+  Find an entry in the seed table, and mark it as the most recently
+  used. Returns None if the entry is not in the table.
+  """
+  if (cells_string not in seed_table):
+    return None
+  entry = seed_table.pop(cells_string)
+  seed_table[cells_string] = entry
+  return entry
+#
+# seed_entry(seed) -- returns [cells, key]
+#
+def seed_entry(seed):
+  """
+  Find the entry for the cells of a seed in the seed table, adding
+  it if necessary.
+  """
+  cells_string = cells_key(seed.cells)
+  entry = table_entry(cells_string)
+  if (entry is None):
+    [canonical, rotation, flip] = canonical_form(seed.cells)
+    canonical_string = cells_key(canonical)
+    canonical_entry = table_entry(canonical_string)
+    if (canonical_entry is None):
+      canonical = np.array(canonical, dtype=np.uint8)
+      canonical.flags.writeable = False
+      key = hashlib.sha1(canonical_string).hexdigest()
+      canonical_entry = [canonical, key]
+      seed_table[canonical_string] = canonical_entry
+    [canonical, key] = canonical_entry
+    # undo the flip and then the rotation, to get a view of the
+    # canonical cells with the same orientation as the seed
+    if (flip == 1):
+      canonical = np.flipud(canonical)
+    entry = [np.rot90(canonical, -rotation), key]
+    seed_table[cells_string] = entry
+    # Keep the table from growing without limit in a long run.
+    while (len(seed_table) > (10 * mparam.pop_size)):
+      seed_table.popitem(last=False)
+  return entry
+#
+# seed_key(seed) -- returns key
+#
+def seed_key(seed):
+  """
+  Make a key for the contest cache from the canonical cells of a
+  seed. Seeds that are the same up to rotation and flipping have
+  the same key.
+  """
+  [cells, key] = seed_entry(seed)
+  return key
+#
+# intern_seed(seed) -- returns NULL
+#
+def intern_seed(seed):
+  """
+  Replace the cells of a seed with the shared, read-only view of its
+  canonical cells in the seed table. Seeds never change their cells
+  in place (see Seed in model_classes.py), so the shared cells never
+  change.
+  """
+  [cells, key] = seed_entry(seed)
+  seed.cells = cells
+  # 
+  # returns NULL
+  # 
+"""
+Cache the results of contests
+"""
+#
+# The contest cache (see ContestCache in model_classes.py and
+# contest_cache_size in model_parameters.py). Only the main process
+# looks up and adds contests; the worker processes just play them.
+#
+contest_cache = mclass.ContestCache(mparam.contest_cache_size, \
+  mparam.contest_cache_path)
+#
+# cached_scores(g, pairs, width_factor, height_factor, time_factor, \
+#   num_trials, play) -- returns scores
+#
+def cached_scores(g, pairs, width_factor, height_factor, time_factor, \
+  num_trials, play):
+  """
+  Score a list of pairs of seeds, [seed1, seed2], with num_trials
+  trials for each pair. The counts of wins and ties for each pair are
+  looked up in the contest cache, and only the trials that are missing
+  are played, with play (play_batch() or play_parallel()). The new
+  trials are added to the cache. With the cache, pairs that are the
+  same contest (in either order, see seed_key()) are only played once,
+  and they all get the result. Returns a list with [score1, score2]
+  for each pair.
+  """
+  factors = (width_factor, height_factor, time_factor)
+  use_cache = (contest_cache.max_size > 0)
+  #
+  # Look up the pairs in the cache. new_index[p] is the position of
+  # pair p in new_pairs, or None if the cache has all of its trials.
+  #
+  keys = []
+  old_counts = []
+  new_index = []
+  new_pairs = []
+  new_trials = []
+  new_keys = []
+  played = {}
+  for [seed1, seed2] in pairs:
+    if (use_cache):
+      key = [seed_key(seed1), seed_key(seed2)]
+      counts = contest_cache.lookup(key[0], key[1], factors)
+      contest = (min(key), max(key))
+    else:
+      key = None
+      counts = [0, 0, 0]
+      contest = None
+    keys.append(key)
+    old_counts.append(counts)
+    missing = num_trials - sum(counts)
+    if (missing <= 0):
+      new_index.append(None)
+    elif (use_cache and (contest in played)):
+      new_index.append(played[contest])
+    else:
+      played[contest] = len(new_pairs)
+      new_index.append(len(new_pairs))
+      new_pairs.append([seed1, seed2])
+      new_trials.append(missing)
+      new_keys.append(key)
+  #
+  # Play the missing trials and add them to the cache, once for each
+  # contest.
+  #
+  new_counts = play(g, new_pairs, width_factor, height_factor, \
+    time_factor, new_trials)
+  total_counts = []
+  for k in range(len(new_pairs)):
+    if (use_cache):
+      total_counts.append(contest_cache.add(new_keys[k][0], \
+        new_keys[k][1], factors, new_counts[k]))
+    else:
+      total_counts.append(new_counts[k])
+  scores = []
+  for p in range(len(pairs)):
+    k = new_index[p]
+    if (k is None):
+      counts = old_counts[p]
+    else:
+      counts = total_counts[k]
+      # a pair that is the same contest in the other order
+      if (use_cache and (keys[p][0] != new_keys[k][0])):
+        counts = [counts[1], counts[0], counts[2]]
+    scores.append(contest_scores(counts))
+  return scores
+#
+# win_test(g, seed1, seed2, width_factor, height_factor, time_factor, \
+#   max_trials, min_wins) -- returns True or False
+#
+def win_test(g, seed1, seed2, width_factor, height_factor, time_factor, \
+  max_trials, min_wins):
+  """
+  Decide whether seed2 wins at least min_wins of max_trials trials
+  against seed1, counting a tie as half a win (see win_tests()).
+  """
+  [seed2_wins] = win_tests(g, [[seed1, seed2]], width_factor, \
+    height_factor, time_factor, max_trials, min_wins)
+  return seed2_wins
+#
+# win_tests(g, pairs, width_factor, height_factor, time_factor, \
+#   max_trials, min_wins) -- returns list of True or False
+#
+def win_tests(g, pairs, width_factor, height_factor, time_factor, \
+  max_trials, min_wins):
+  """
+  For each pair of seeds, [seed1, seed2], decide whether seed2 wins at
+  least min_wins of max_trials trials against seed1, counting a tie as
+  half a win. The trials are played in rounds, and the test of a pair
+  stops as soon as its answer is settled: when seed2 has min_wins, or
+  when it cannot reach min_wins in the trials that remain. The answer
+  is the same as after all max_trials trials, but a lopsided contest
+  needs far fewer trials. No more than max_trials trials are played
+  for a pair. Trials in the contest cache are used first (see
+  cached_scores()); if the cache has more than max_trials trials,
+  seed2 must win the same fraction of them. In each round, the pairs
+  that are not yet settled are played together with play_batch().
+  """
+  g = get_backend(g)
+  factors = (width_factor, height_factor, time_factor)
+  use_cache = (contest_cache.max_size > 0)
+  #
+  keys = []
+  counts = []
+  for [seed1, seed2] in pairs:
+    if (use_cache):
+      key1 = seed_key(seed1)
+      key2 = seed_key(seed2)
+      keys.append([key1, key2])
+      counts.append(contest_cache.lookup(key1, key2, factors))
+    else:
+      counts.append([0, 0, 0])
+  #
+  results = [None] * len(pairs)
+  while (True):
+    playing = []
+    playing_pairs = []
+    trials = []
+    for p in range(len(pairs)):
+      if (results[p] is None):
+        [wins1, wins2, ties] = counts[p]
+        num_trials = wins1 + wins2 + ties
+        points2 = wins2 + (0.5 * ties)
+        num_left = max_trials - num_trials
+        if (num_trials >= max_trials):
+          results[p] = (points2 >= \
+            (min_wins * num_trials / float(max_trials)))
+        elif (points2 >= min_wins):
+          results[p] = True
+        elif ((points2 + num_left) < min_wins):
+          results[p] = False
+        else:
+          #
+          # The next batch is the smallest number of trials that could
+          # settle the answer: enough trials for seed2 to reach
+          # min_wins if it wins them all, or to fall out of reach if
+          # it loses them all. Fewer trials could not settle it, so no
+          # trial is wasted.
+          #
+          to_pass = int(np.ceil(min_wins - points2))
+          to_fail = int(np.floor(num_left - (min_wins - points2))) + 1
+          playing.append(p)
+          playing_pairs.append(pairs[p])
+          trials.append(max(1, min(to_pass, to_fail, num_left)))
+    if (len(playing) == 0):
+      return results
+    new_counts = play_batch(g, playing_pairs, width_factor, \
+      height_factor, time_factor, trials)
+    for i in range(len(playing)):
+      p = playing[i]
+      if (use_cache):
+        [key1, key2] = keys[p]
+        counts[p] = contest_cache.add(key1, key2, factors, new_counts[i])
+      else:
+        [wins1, wins2, ties] = counts[p]
+        counts[p] = [wins1 + new_counts[i][0], wins2 + new_counts[i][1], \
+          ties + new_counts[i][2]]
+#
+# save_contest_cache() -- returns NULL
+#
+def save_contest_cache():
+  """
+  Save the contest cache in the file contest_cache_path, if there
+  is one (see model_parameters.py).
+  """
+  contest_cache.save()
+  # 
+  # returns NULL
+  # 
+#
 # update_history(g, pop, i, j, width_factor, height_factor, \
 #   time_factor, num_trials) -- returns NULL
 #
@@ -320,7 +1005,7 @@ def update_history(g, pop, i, j, width_factor, height_factor, \
   # If i == j, let's just call it a tie.
   #
   if (i == j):
-    pop[i].history[i] = 0.5
+    pop.set_scores([i], [i], [0.5])
     return
   #
   # Call score_pair()
@@ -330,8 +1015,46 @@ def update_history(g, pop, i, j, width_factor, height_factor, \
   #
   # Update pop[i] and pop[j] with the new scores. 
   #
-  pop[i].history[j] = scorei
-  pop[j].history[i] = scorej
+  pop.set_scores([i, j], [j, i], [scorei, scorej])
+  # 
+  # returns NULL
+  # 
+#
+# update_history_batch(g, pop, index_pairs, width_factor, height_factor, \
+#   time_factor, num_trials) -- returns NULL
+#
+def update_history_batch(g, pop, index_pairs, width_factor, height_factor, \
+  time_factor, num_trials):
+  """
+  Like update_history(), but for a list of pairs of addresses, [i, j],
+  which are shared out among the worker processes (see num_workers in
+  model_parameters.py) and played together with score_batch() if g is
+  a batch backend (see contest_engine in model_parameters.py).
+  """
+  pairs = []
+  contest_pairs = []
+  rows = []
+  cols = []
+  new_scores = []
+  for [i, j] in index_pairs:
+    # if i == j, let's just call it a tie
+    if (i == j):
+      rows.append(i)
+      cols.append(i)
+      new_scores.append(0.5)
+    else:
+      pairs.append([pop[i], pop[j]])
+      contest_pairs.append([i, j])
+  scores = score_parallel(g, pairs, width_factor, height_factor, \
+    time_factor, num_trials)
+  for p in range(len(contest_pairs)):
+    [i, j] = contest_pairs[p]
+    [scorei, scorej] = scores[p]
+    rows.extend([i, j])
+    cols.extend([j, i])
+    new_scores.extend([scorei, scorej])
+  # Update the scores and fitnesses all at once.
+  pop.set_scores(rows, cols, new_scores)
   # 
   # returns NULL
   # 
@@ -347,14 +1070,13 @@ def update_similarity(pop, i, j):
   # If i == j, the similarity score is the maximum.
   #
   if (i == j):
-    pop[i].similarities[i] = 1.0
+    pop.set_similarity(i, i, 1.0)
     return
   #
   # Calculate the similarity and update the population record.
   #
   sim = similarity(pop[i], pop[j])
-  pop[i].similarities[j] = sim
-  pop[j].similarities[i] = sim
+  pop.set_similarity(i, j, sim)
   # 
   # returns NULL
   # 
@@ -368,6 +1090,10 @@ def find_top_seeds(population, sample_size):
   pop_size = len(population)
   assert pop_size > sample_size
   assert sample_size > 0
+  # A population partitions its fitness vector instead of summing
+  # every history and sorting every seed; ties stay in address order.
+  if (isinstance(population, mclass.Population)):
+    return population.top_seeds(sample_size)
   # calculate fitness for each seed in the population, from their history
   scored_pop = []
   for i in range(pop_size):
@@ -390,27 +1116,18 @@ def random_sample(population, sample_size):
   Get a random sample of sample_size seeds from the population.
   """
   #
-  # To avoid duplicates in the sample, randomize the order of the
-  # population and then take the first sample_size seeds
-  # from the randomized list.
+  # To avoid duplicates in the sample, draw sample_size distinct
+  # addresses, uniformly without replacement, with rand.sample().
+  # Only the addresses that are drawn are looked at, so a small
+  # tournament does not need a pass over the whole population.
   #
   pop_size = len(population)
   assert pop_size > sample_size
   assert sample_size > 0
-  # attach a random number to each seed in the population
-  randomized_pop = []
-  for i in range(pop_size):
-    # item = [random real number between 0 and 1, the i-th seed]
-    item = [rand.uniform(0, 1), population[i]]
-    randomized_pop.append(item)
-  # sort randomized_pop in order of the attached random numbers
-  randomized_pop.sort(key = lambda x: x[0]) # sort by random number
-  # take the top sample_size items from randomized_pop and
-  # remove their attached random numbers
   sample_pop = []
-  for i in range(sample_size):
-    sample_pop.append(randomized_pop[i][1]) # drop random number
-  # return the cleaned-up list of sample_size seeds
+  for i in rand.sample(xrange(pop_size), sample_size):
+    sample_pop.append(population[i])
+  # return the list of sample_size seeds
   return sample_pop
 #
 # find_best_seed(sample) -- returns best_seed
@@ -420,6 +1137,10 @@ def find_best_seed(sample):
   In the list of seeds in sample, find the seed (not necessarily
   unique) with maximum fitness.
   """
+  # A population takes the argmax of its fitness vector, which picks
+  # the same seed as the loop below: the first of any tied seeds.
+  if (isinstance(sample, mclass.Population)):
+    return sample.best_seed()
   sample_size = len(sample)
   assert sample_size > 0
   best_seed = sample[0]
@@ -437,6 +1158,10 @@ def find_worst_seed(sample):
   In the list of seeds in sample, find the seed (not necessarily
   unique) with minimum fitness.
   """
+  # A population takes the argmin of its fitness vector, the same
+  # first worst seed as the loop below.
+  if (isinstance(sample, mclass.Population)):
+    return sample.worst_seed()
   sample_size = len(sample)
   assert sample_size > 0
   worst_seed = sample[0]
@@ -447,6 +1172,37 @@ def find_worst_seed(sample):
       worst_score = worst_seed.fitness()
   return worst_seed
 #
+# find_worst_seeds(population, sample_size) -- returns sample_pop
+#
+def find_worst_seeds(population, sample_size):
+  """
+  Find the worst (least fit) sample_size seeds in the population.
+  Ties are broken in order of address, so the first seed is the
+  same as the seed found by find_worst_seed().
+  """
+  pop_size = len(population)
+  assert pop_size >= sample_size
+  assert sample_size > 0
+  # A population partitions its fitness vector, so only the chosen
+  # seeds are sorted, and the first of them is find_worst_seed().
+  if (isinstance(population, mclass.Population)):
+    return population.bottom_seeds(sample_size)
+  # calculate fitness for each seed in the population, from their history
+  scored_pop = []
+  for i in range(pop_size):
+    item = [population[i].fitness(), population[i]]
+    scored_pop.append(item)
+  # sort population in order of increasing fitness (the sort is stable,
+  # so seeds with equal fitness stay in order of address)
+  scored_pop.sort(key = lambda x: x[0]) # sort by fitness
+  # take the bottom sample_size items from scored_pop and
+  # remove their attached fitness numbers
+  sample_pop = []
+  for i in range(sample_size):
+    sample_pop.append(scored_pop[i][1]) # drop fitness number
+  # return the cleaned-up list of sample_size seeds
+  return sample_pop
+#
 # average_fitness(sample) -- returns average
 #
 def average_fitness(sample):
@@ -454,6 +1210,10 @@ def average_fitness(sample):
   Given a list of sample seeds, return their average fitness,
   relative to the whole population.
   """
+  # A population sums its fitness vector, which holds the sum of each
+  # history, so the histories need not be summed one seed at a time.
+  if (isinstance(sample, mclass.Population)):
+    return sample.average_fitness()
   sample_size = len(sample)
   assert sample_size > 0
   total_fitness = 0.0
@@ -481,6 +1241,53 @@ def archive_elite(population, elite_size, log_directory, log_name, run_id_number
   # returns NULL
   # 
 #
+# save_checkpoint(checkpoint_path, pop, n, log_name, log_size) 
+#   -- returns NULL
+#
+def save_checkpoint(checkpoint_path, pop, n, log_name, log_size):
+  """
+  Store the state of a run in a checkpoint file: the population, the
+  number of births so far (n), the name of the log file, the size of
+  the log file so far (log_size), the state of the random number
+  generator, and the contests in the contest cache (see atomic_pickle()
+  in model_classes.py).
+  """
+  checkpoint = [pop, n, log_name, rand.getstate(), log_size, \
+    contest_cache.contests]
+  mclass.atomic_pickle(checkpoint, checkpoint_path)
+  # 
+  # returns NULL
+  # 
+#
+# load_checkpoint(checkpoint_path) -- returns [pop, n, log_name, log_size]
+#
+def load_checkpoint(checkpoint_path):
+  """
+  Read a checkpoint file that was stored by save_checkpoint() and
+  restore the state of the random number generator and the contests
+  in the contest cache, so that the resumed run plays exactly the
+  same contests as the original run. Checkpoints from before the
+  log size and the cache were stored give None for log_size. If the
+  machine stopped while the checkpoint was being saved, the complete
+  copy that was left behind is read (see load_pickle() in
+  model_classes.py).
+  """
+  checkpoint = mclass.load_pickle(checkpoint_path)
+  assert checkpoint is not None
+  [pop, n, log_name, random_state] = checkpoint[0:4]
+  rand.setstate(random_state)
+  log_size = None
+  if (len(checkpoint) > 4):
+    [log_size, contests] = checkpoint[4:6]
+    if (contest_cache.max_size > 0):
+      contest_cache.contests = contests
+      contest_cache.trim()
+  # Checkpoints from before populations were kept in matrices
+  # (see Population in model_classes.py) have a list of seeds.
+  if (not isinstance(pop, mclass.Population)):
+    pop = mclass.Population(pop)
+  return [pop, n, log_name, log_size]
+#
 # similarity(seed0, seed1) -- returns similarity
 #
 def similarity(seed0, seed1):
@@ -515,12 +1322,13 @@ def find_similar_seeds(target_seed, pop, min_similarity, max_similarity):
   This function assumes that target_seed is in the population and
   the list target_seed.similarities is up-to-date. 
   """
+  similarities = target_seed.similarities
+  similar = (similarities >= min_similarity) & \
+    (similarities <= max_similarity)
+  similar[target_seed.address] = False
   similar_seeds = []
-  for i in range(len(pop)):
-    if ((target_seed.similarities[i] >= min_similarity) and \
-      (target_seed.similarities[i] <= max_similarity) and \
-      (target_seed.address != i)):
-      similar_seeds.append(pop[i])
+  for i in np.flatnonzero(similar):
+    similar_seeds.append(pop[i])
   # return the seeds that satisfy the conditions
   return similar_seeds
 #
@@ -578,9 +1386,24 @@ def mate(seed0, seed1):
   # Return the resulting child.
   return child_seed
 #
-# uniform_asexual(candidate_seed, pop, n) -- returns [pop, message]
+# Each type of reproduction is split into two steps. First, a function
+# such as uniform_asexual_child() makes a child from the population,
+# without changing the population, and returns it with a report:
+#
+#   report = [kind, labelled_seeds, replaced_label]
 #
-def uniform_asexual(candidate_seed, pop, n):
+# where kind is the type of reproduction that was actually used (after
+# any fallback to another type), labelled_seeds is a list of [label,
+# seed] for the seeds that will be shown in the message (the parents
+# and the child), and replaced_label is the label for the seed that
+# the child will replace. Second, make_children() puts the children
+# in place of the least fit seeds, builds their histories, and makes
+# the messages. A fusion seed is first checked with accept_fusion(),
+# which may replace it with a sexual child.
+#
+# uniform_asexual_child(candidate_seed, pop) -- returns [child, report]
+#
+def uniform_asexual_child(candidate_seed, pop):
   """
   Create a new seed by randomly mutating an existing seed. The
   new seed is generated by selecting a parent seed and flipping
@@ -592,48 +1415,23 @@ def uniform_asexual(candidate_seed, pop, n):
   # Mutate the best seed to make a new child. The only mutation
   # here is flipping bits.
   mutation_rate = mparam.mutation_rate
-  s1 = copy.deepcopy(s0)
+  s1 = s0.view()
   s1.flip_bits(mutation_rate)
   s1.num_living = s1.count_ones() # update count of living cells
-  # Find the least fit old seed in the population. It's not a problem
-  # if there are ties.
-  s2 = find_worst_seed(pop)
   # Now we have:
   #
   # s0 = fit parent seed
   # s1 = the mutated new child
   # s2 = the least fit old seed, which will be replaced by the mutated child
   #
-  # Replace the least fit old seed in the population (s2) with the
-  # new child (s1).
-  i = s2.address # find the position of the old seed (s2)
-  s1.address = i # copy the old position of the old seed into s1, the child
-  pop[i] = s1 # replace s2 (old seed) in population (pop) with s1 (new child)
-  # Build a history for the new seed, by matching it against all seeds
-  # in the population.
-  width_factor = mparam.width_factor
-  height_factor = mparam.height_factor
-  time_factor = mparam.time_factor
-  num_trials = mparam.num_trials
-  pop_size = len(pop)
-  for j in range(pop_size):
-    update_history(g, pop, i, j, width_factor, height_factor, \
-      time_factor, num_trials)
-    update_similarity(pop, i, j)
-  # Report on the new history of the new seed
-  message = "Run: {}".format(n) + \
-    "  Parent fitness (s0): {:.3f}".format(s0.fitness()) + \
-    "  Child fitness (s1): {:.3f}".format(s1.fitness()) + \
-    "  Replaced seed fitness (s2): {:.3f}\n".format(s2.fitness())
-  # It is possible that s1 is worse than s2, if there was a bad mutation in s1.
-  # Let's not worry about that, since s1 will soon be replaced if it is less
-  # fit than the least fit seed (that is, s2).
-  return [pop, message]
+  report = ["uniform asexual", [["Parent fitness (s0)", s0], \
+    ["Child fitness (s1)", s1]], "Replaced seed fitness (s2)"]
+  return [s1, report]
 #
-# variable_asexual(candidate_seed, pop, n, max_seed_area) 
-# -- returns [pop, message]
+# variable_asexual_child(candidate_seed, pop, max_seed_area) 
+# -- returns [child, report]
 #
-def variable_asexual(candidate_seed, pop, n, max_seed_area):
+def variable_asexual_child(candidate_seed, pop, max_seed_area):
   """
   Create a new seed by randomly mutating, growing, and shrinking
   an existing seed. The new seed is generated by selecting a parent 
@@ -651,51 +1449,25 @@ def variable_asexual(candidate_seed, pop, n, max_seed_area):
   prob_shrink = mparam.prob_shrink
   seed_density = mparam.seed_density
   mutation_rate = mparam.mutation_rate
-  s1 = copy.deepcopy(s0)
-  s1 = s1.mutate(prob_grow, prob_flip, prob_shrink, seed_density, mutation_rate)
+  s1 = s0.mutate(prob_grow, prob_flip, prob_shrink, seed_density, mutation_rate)
   s1.num_living = s1.count_ones() # update count of living cells
   # Make sure the area of the new seed is not greater than the maximum.
   # If it is too big, then default to uniform_asexual reproduction.
   if ((s1.xspan * s1.yspan) > max_seed_area):
-    return uniform_asexual(candidate_seed, pop, n)
-  # Find the least fit old seed in the population. It's not a problem
-  # if there are ties.
-  s2 = find_worst_seed(pop)
+    return uniform_asexual_child(candidate_seed, pop)
   # Now we have:
   #
   # s0 = fit parent seed
   # s1 = the mutated new child
   # s2 = the least fit old seed, which will be replaced by the mutated child
   #
-  # Replace the least fit old seed in the population (s2) with the
-  # new child (s1).
-  i = s2.address # find the position of the old seed (s2)
-  s1.address = i # copy the old position of the old seed into s1, the child
-  pop[i] = s1 # replace s2 (old seed) in population (pop) with s1 (new child)
-  # Build a history for the new seed, by matching it against all seeds
-  # in the population.
-  width_factor = mparam.width_factor
-  height_factor = mparam.height_factor
-  time_factor = mparam.time_factor
-  num_trials = mparam.num_trials
-  pop_size = len(pop)
-  for j in range(pop_size):
-    update_history(g, pop, i, j, width_factor, height_factor, \
-      time_factor, num_trials)
-    update_similarity(pop, i, j)
-  # Report on the new history of the new seed
-  message = "Run: {}".format(n) + \
-    "  Parent fitness (s0): {:.3f}".format(s0.fitness()) + \
-    "  Child fitness (s1): {:.3f}".format(s1.fitness()) + \
-    "  Replaced seed fitness (s2): {:.3f}\n".format(s2.fitness())
-  # It is possible that s1 is worse than s2, if there was a bad mutation in s1.
-  # Let's not worry about that, since s1 will soon be replaced if it is less
-  # fit than the least fit seed (that is, s2).
-  return [pop, message]
+  report = ["variable asexual", [["Parent fitness (s0)", s0], \
+    ["Child fitness (s1)", s1]], "Replaced seed fitness (s2)"]
+  return [s1, report]
 #
-# sexual(candidate_seed, pop, n, max_seed_area) -- returns [pop, message]
+# sexual_child(candidate_seed, pop, max_seed_area) -- returns [child, report]
 #
-def sexual(candidate_seed, pop, n, max_seed_area):
+def sexual_child(candidate_seed, pop, max_seed_area):
   """
   Create a new seed either asexually or sexually. First a single parent
   is chosen from the population. If a second parent can be found that
@@ -712,7 +1484,7 @@ def sexual(candidate_seed, pop, n, max_seed_area):
   num_similar_seeds = len(similar_seeds)
   # If no similar seeds were found, then use variable asexual reproduction.
   if (num_similar_seeds == 0):
-    return variable_asexual(candidate_seed, pop, n, max_seed_area)
+    return variable_asexual_child(candidate_seed, pop, max_seed_area)
   # Run a new tournament to select a second seed s1 as a mate for s0.
   tournament_size = mparam.tournament_size
   if (num_similar_seeds <= tournament_size):
@@ -733,10 +1505,7 @@ def sexual(candidate_seed, pop, n, max_seed_area):
   # Make sure the area of the new seed is not greater than the maximum.
   # If it is too big, then default to uniform_asexual reproduction.
   if ((s3.xspan * s3.yspan) > max_seed_area):
-    return uniform_asexual(candidate_seed, pop, n)
-  # Find the least fit old seed in the population. It's not a problem
-  # if there are ties.
-  s4 = find_worst_seed(pop)
+    return uniform_asexual_child(candidate_seed, pop)
   # Now we have:
   #
   # s0 = parent 0
@@ -745,36 +1514,14 @@ def sexual(candidate_seed, pop, n, max_seed_area):
   # s3 = the mutated new child
   # s4 = the least fit old seed, which will be replaced by the mutated child
   #
-  # Replace the least fit old seed in the population (s4) with the
-  # new child (s3).
-  i = s4.address # find the position of the old seed (s4)
-  s3.address = i # copy the old position of the old seed into s3, the child
-  pop[i] = s3 # replace s4 (old seed) in population (pop) with s3 (new child)
-  # Build a history for the new seed, by matching it against all seeds
-  # in the population.
-  width_factor = mparam.width_factor
-  height_factor = mparam.height_factor
-  time_factor = mparam.time_factor
-  num_trials = mparam.num_trials
-  pop_size = len(pop)
-  for j in range(pop_size):
-    update_history(g, pop, i, j, width_factor, height_factor, \
-      time_factor, num_trials)
-    update_similarity(pop, i, j)
-  # Report on the new history of the new seed
-  message = "Run: {}".format(n) + \
-    "  Parent 0 fitness (s0): {:.3f}".format(s0.fitness()) + \
-    "  Parent 1 fitness (s1): {:.3f}".format(s1.fitness()) + \
-    "  Child fitness (s3): {:.3f}".format(s3.fitness()) + \
-    "  Replaced seed fitness (s4): {:.3f}\n".format(s4.fitness())
-  # It is possible that s3 is worse than s4, if there was a bad mutation in s3.
-  # Let's not worry about that, since s3 will soon be replaced if it is less
-  # fit than the least fit seed (that is, s4).
-  return [pop, message]
+  report = ["sexual", [["Parent 0 fitness (s0)", s0], \
+    ["Parent 1 fitness (s1)", s1], ["Child fitness (s3)", s3]], \
+    "Replaced seed fitness (s4)"]
+  return [s3, report]
 #
-# fusion(candidate_seed, pop, n, max_seed_area) -- returns [pop, message]
+# fusion_child(candidate_seed, pop, max_seed_area) -- returns [child, report]
 #
-def fusion(candidate_seed, pop, n, max_seed_area):
+def fusion_child(candidate_seed, pop, max_seed_area):
   """
   Fuse two seeds together. Randomly rotate the seeds before
   joining them. Let's put one seed on the left and the other 
@@ -809,7 +1556,7 @@ def fusion(candidate_seed, pop, n, max_seed_area):
   # Make sure the area of the new seed is not greater than the maximum.
   # If it is too big, then default to sexual reproduction.
   if ((xspan * yspan) > max_seed_area):
-    return sexual(candidate_seed, pop, n, max_seed_area)
+    return sexual_child(candidate_seed, pop, max_seed_area)
   # Copy s2 into the left side of s4.
   s4 = mclass.Seed(xspan, yspan, pop_size) # cells initialized to zero
   for x in range(s2.xspan):
@@ -821,9 +1568,6 @@ def fusion(candidate_seed, pop, n, max_seed_area):
       s4.cells[x + s2.xspan + 1][y] = s3.cells[x][y]
   # Update count of living cells
   s4.num_living = s4.count_ones()
-  # Find the least fit old seed in the population. It's not a problem
-  # if there are ties.
-  s5 = find_worst_seed(pop)
   # Now we have:
   #
   # s0 = seed 0
@@ -836,44 +1580,126 @@ def fusion(candidate_seed, pop, n, max_seed_area):
   # NOTE: we're not applying mutation here, because this is not a form
   # of reproduction. It's a merger of two seeds. 
   #
-  # Replace the least fit old seed in the population (s5) with the
-  # new fusion seed (s4).
-  i = s5.address # find the position of the old seed (s5)
-  s4.address = i # copy the old position of the old seed into s4, the new fusion seed
-  pop[i] = s4 # replace s5 (old seed) in population (pop) with s4 (new fusion seed)
-  # Build a history for the new seed, by matching it against all seeds
-  # in the population.
-  width_factor = mparam.width_factor
-  height_factor = mparam.height_factor
-  time_factor = mparam.time_factor
-  num_trials = mparam.num_trials
-  for j in range(pop_size):
-    update_history(g, pop, i, j, width_factor, height_factor, \
-      time_factor, num_trials)
-    update_similarity(pop, i, j)
-  # If the flag immediate_symbiosis_flag is set to "1", then
-  # we must test to see whether s4 is more fit than both s1 and s2.
-  if (mparam.immediate_symbiosis_flag == 1):
-    if ((s0.fitness() >= s4.fitness()) or (s1.fitness() >= s4.fitness)):
-      # If either of the parts (s0 or s1) has a fitness greater than
-      # or equal to the fitness of s4, then default to sexual reproduction.
-      # Symbiosis means that the whole is more fit than the parts.
-      # When the flag immediate_symbiosis_flag is set to "1", we
-      # insist that symbiosis should happen immediately, rather than
-      # hoping that it will happen in some future generation.
-      return sexual(candidate_seed, pop, n, max_seed_area)
-  # Report on the new history of the new seed.
-  message = "Run: {}".format(n) + \
-    "  Seed 0 fitness (s0): {:.3f}".format(s0.fitness()) + \
-    "  Seed 1 fitness (s1): {:.3f}".format(s1.fitness()) + \
-    "  Fusion fitness (s4): {:.3f}".format(s4.fitness()) + \
-    "  Replaced seed fitness (s5): {:.3f}\n".format(s5.fitness())
-  # Return with the updated population and a message.
-  return [pop, message]
+  report = ["fusion", [["Seed 0 fitness (s0)", s0], \
+    ["Seed 1 fitness (s1)", s1], ["Fusion fitness (s4)", s4]], \
+    "Replaced seed fitness (s5)"]
+  return [s4, report]
 #
-# fission(candidate_seed, pop, n, max_seed_area) -- returns [pop, message]
+# evaluate_fusion(g, pop, report) -- returns [accepted, fusion_scores]
 #
-def fission(candidate_seed, pop, n, max_seed_area):
+def evaluate_fusion(g, pop, report):
+  """
+  Given the report of a fusion child (see fusion_child()), check
+  whether the fusion is accepted. If the flag immediate_symbiosis_flag
+  is set to "1", then the fusion seed (s4) must be more fit than both
+  of its parts (s0 and s1), as they would be after s4 replaced the
+  least fit seed (s5). The population is not changed. Instead, s4
+  plays the population in rounds, first its parts and then the other
+  seeds from the most fit down, and the fusion is rejected as soon as
+  s4 cannot beat one of its parts, even if s4 won all of its remaining
+  contests. Returns accepted (True or False) and fusion_scores, which
+  maps the address j of each seed that s4 has played to the scores
+  [s4 score, seed j score] of their contest.
+  """
+  if (mparam.immediate_symbiosis_flag != 1):
+    return [True, {}]
+  [[label0, s0], [label1, s1], [label4, s4]] = report[1]
+  pop_size = len(pop)
+  worst_address = find_worst_seed(pop).address
+  #
+  # The highest total score that s4 can still reach: 0.5 for its
+  # contest with itself (at the address of s5), and a win in each of
+  # the contests that remain to be played.
+  #
+  s4_total = 0.5 + (pop_size - 1)
+  #
+  # The lowest total score that each part can still reach: its present
+  # total, less its score against s5, plus its score against s4 once
+  # they have played. A part that will not be in the population (it is
+  # s5 itself, or a shuffled copy; see fusion_test_flag) keeps its
+  # present total.
+  #
+  part_totals = []
+  part_addresses = []
+  for part in [s0, s1]:
+    i = part.address
+    if ((pop[i] is part) and (i != worst_address)):
+      part_totals.append(pop.fitnesses[i] - pop.scores[i][worst_address])
+      part_addresses.append(i)
+    else:
+      part_totals.append(np.sum(part.history))
+      part_addresses.append(None)
+  #
+  # Play the parts first, since they decide the test, and then the
+  # most fit seeds, since s4 is most likely to lose against them.
+  #
+  opponents = []
+  for i in part_addresses:
+    if ((i is not None) and (i not in opponents)):
+      opponents.append(i)
+  num_parts = len(opponents)
+  for j in pop.sorted_addresses(pop_size, True):
+    if ((j != worst_address) and (j not in opponents)):
+      opponents.append(j)
+  #
+  # Double the size of each round, so that a fusion that is accepted
+  # takes only a few rounds.
+  #
+  fusion_scores = {}
+  start = 0
+  round_size = max(num_parts, 1)
+  while (start < len(opponents)):
+    stop = min(start + round_size, len(opponents))
+    pairs = []
+    for j in opponents[start:stop]:
+      pairs.append([s4, pop[j]])
+    scores = score_parallel(g, pairs, mparam.width_factor, \
+      mparam.height_factor, mparam.time_factor, mparam.num_trials)
+    for m in range(stop - start):
+      j = opponents[start + m]
+      [score4, scorej] = scores[m]
+      fusion_scores[j] = [score4, scorej]
+      s4_total = s4_total - 1.0 + score4
+      for p in range(2):
+        if (part_addresses[p] == j):
+          part_totals[p] = part_totals[p] + scorej
+    # If either of the parts (s0 or s1) has a fitness greater than
+    # or equal to the fitness of s4, then the fusion is rejected.
+    # Symbiosis means that the whole is more fit than the parts.
+    # When the flag immediate_symbiosis_flag is set to "1", we
+    # insist that symbiosis should happen immediately, rather than
+    # hoping that it will happen in some future generation.
+    if ((part_totals[0] >= s4_total) or (part_totals[1] >= s4_total)):
+      return [False, fusion_scores]
+    start = stop
+    round_size = 2 * round_size
+  return [True, fusion_scores]
+#
+# accept_fusion(g, pop, candidate_seed, max_seed_area, child, report)
+#   -- returns [child, report, known_scores]
+#
+def accept_fusion(g, pop, candidate_seed, max_seed_area, child, report):
+  """
+  If the child is a fusion seed and the flag immediate_symbiosis_flag
+  is set to "1", check whether the fusion is accepted (see
+  evaluate_fusion()). If it is not accepted, the population is left as
+  it was, and we default to sexual reproduction: the child is replaced
+  by a child of sexual_child(). Returns the child, its report, and
+  known_scores, which maps the address j of each seed that the child
+  has already played to the scores [child score, seed j score] of
+  their contest, or None if the child has not played any seeds.
+  """
+  if ((report[0] != "fusion") or (mparam.immediate_symbiosis_flag != 1)):
+    return [child, report, None]
+  [accepted, known_scores] = evaluate_fusion(g, pop, report)
+  if (not accepted):
+    [child, report] = sexual_child(candidate_seed, pop, max_seed_area)
+    return [child, report, None]
+  return [child, report, known_scores]
+#
+# fission_child(candidate_seed, pop, max_seed_area) -- returns [child, report]
+#
+def fission_child(candidate_seed, pop, max_seed_area):
   """
   In fusion, we use the convention of putting one seed on 
   the left and the other seed on the right, before we fuse
@@ -894,7 +1720,7 @@ def fission(candidate_seed, pop, n, max_seed_area):
   # See whether the seed is big enough to split. If it is too
   # small, then default to sexual reproduction.
   if (s0.xspan <= min_s_xspan):
-    return sexual(candidate_seed, pop, n, max_seed_area)
+    return sexual_child(candidate_seed, pop, max_seed_area)
   # Location of the most sparse column. If there are ties, the
   # first sparse column will be chosen.
   sparse_col = np.argmin(np.sum(s0.cells, axis = 0))
@@ -902,7 +1728,7 @@ def fission(candidate_seed, pop, n, max_seed_area):
   left_cells = s0.cells[0:sparse_col, :]
   right_cells = s0.cells[(sparse_col + 1):, :]
   # Initialize a seed for the left or right part.
-  s1 = copy.deepcopy(s0)
+  s1 = s0.view()
   # If both parts are big enough, randomly choose one of them.
   if ((left_cells.shape[0] >= min_s_xspan) \
     and (right_cells.shape[0] >= min_s_xspan)):
@@ -918,49 +1744,26 @@ def fission(candidate_seed, pop, n, max_seed_area):
     s1.cells = right_cells
   # If neither part is big enough, use sexual reproduction
   else: 
-    return sexual(candidate_seed, pop, n, max_seed_area)
+    return sexual_child(candidate_seed, pop, max_seed_area)
   # Set the correct dimensions for the new seed
   s1.xspan = s1.cells.shape[0]
   s1.yspan = s1.cells.shape[1]
   # Update count of living cells
   s1.num_living = s1.count_ones()
-  # Find the least fit old seed in the population. It's not a problem
-  # if there are ties.
-  s2 = find_worst_seed(pop)
   # Now we have:
   #
   # s0 = seed 0
   # s1 = left or right side of seed 0
   # s2 = the least fit old seed, which will be replaced by s1
   #
-  # Replace the least fit old seed in the population (s2) with the
-  # chosen part (s1).
-  i = s2.address # find the position of the old seed (s2)
-  s1.address = i # copy the old position of the old seed into s1
-  pop[i] = s1 # replace s2 (old seed) in population (pop) with s1
-  # Build a history for the new seed, by matching it against all seeds
-  # in the population.
-  width_factor = mparam.width_factor
-  height_factor = mparam.height_factor
-  time_factor = mparam.time_factor
-  num_trials = mparam.num_trials
-  pop_size = len(pop)
-  for j in range(pop_size):
-    update_history(g, pop, i, j, width_factor, height_factor, \
-      time_factor, num_trials)
-    update_similarity(pop, i, j)
-  # Report on the new history of the new seed
-  message = "Run: {}".format(n) + \
-    "  Whole fitness (s0): {:.3f}".format(s0.fitness()) + \
-    "  Fragment fitness (s1): {:.3f}".format(s1.fitness()) + \
-    "  Replaced seed fitness (s2): {:.3f}\n".format(s2.fitness())
-  # Return with the updated population and a message.
-  return [pop, message]
+  report = ["fission", [["Whole fitness (s0)", s0], \
+    ["Fragment fitness (s1)", s1]], "Replaced seed fitness (s2)"]
+  return [s1, report]
 #
-# symbiotic(candidate_seed, pop, n, max_seed_area) 
-# -- returns [pop, message]
+# symbiotic_child(candidate_seed, pop, max_seed_area) 
+# -- returns [child, report]
 #
-def symbiotic(candidate_seed, pop, n, max_seed_area):
+def symbiotic_child(candidate_seed, pop, max_seed_area):
   """
   Create a new seed by joining two existing seeds (fusion) or
   by splitting one seed into two seeds (fission). If fission
@@ -981,13 +1784,397 @@ def symbiotic(candidate_seed, pop, n, max_seed_area):
   #
   if (uniform_random < prob_fission):
     # this will be invoked with a probability of prob_fission
-    return fission(candidate_seed, pop, n, max_seed_area)
+    return fission_child(candidate_seed, pop, max_seed_area)
   elif (uniform_random < (prob_fission + prob_fusion)):
     # this will be invoked with a probability of prob_fusion
-    return fusion(candidate_seed, pop, n, max_seed_area)
+    return fusion_child(candidate_seed, pop, max_seed_area)
   else:
     # if neither fission nor fusion, then sexual reproduction
-    return sexual(candidate_seed, pop, n, max_seed_area)
+    return sexual_child(candidate_seed, pop, max_seed_area)
+#
+# report_message(n, report, replaced_seed) -- returns message
+#
+def report_message(n, report, replaced_seed):
+  """
+  Make the message for the n-th child from its report (see
+  uniform_asexual_child()) and the seed that it replaced.
+  """
+  [kind, labelled_seeds, replaced_label] = report
+  message = "Run: {}".format(n)
+  for [label, seed] in labelled_seeds:
+    message = message + "  " + label + ": {:.3f}".format(seed.fitness())
+  message = message + "  " + replaced_label + \
+    ": {:.3f}\n".format(replaced_seed.fitness())
+  return message
+#
+# prescreen(g, pop, children, evaluated) -- returns [opponents, screens]
+#
+def prescreen(g, pop, children, evaluated):
+  """
+  Play each child against a stratified sample of prescreen_size seeds
+  (see model_parameters.py), evenly spaced in the ranking of the
+  population by fitness, from the best seed through the median to the
+  worst seed. The least fit seed in the population has already played
+  the same opponents, so its scores in its history are compared with
+  the scores of the child. Returns the addresses of the opponents and,
+  for each child, screen = [child_total, worst_total, screen_scores],
+  where child_total and worst_total are the sums of the scores of the
+  child and of the least fit seed against the opponents, and 
+  screen_scores maps the address j of each opponent to the scores
+  [child score, opponent score] of the contest between them. A child
+  passes if child_total >= worst_total. If evaluated[k] is not None,
+  the k-th child has already played the population (see
+  evaluate_fusion()), so it passes without a pre-screen, and its
+  screen_scores are evaluated[k].
+  """
+  prescreen_size = mparam.prescreen_size
+  pop_size = len(pop)
+  #
+  # With no pre-screen, every child passes.
+  #
+  if (prescreen_size == 0):
+    screens = []
+    for k in range(len(children)):
+      if (evaluated[k] is not None):
+        screens.append([0.0, 0.0, evaluated[k]])
+      else:
+        screens.append([0.0, 0.0, {}])
+    return [[], screens]
+  #
+  # Choose the opponents, evenly spaced in the ranking.
+  #
+  ranking = pop.sorted_addresses(pop_size, True)
+  opponents = []
+  for r in range(prescreen_size):
+    rank = int(round(r * (pop_size - 1) / float(max(prescreen_size - 1, 1))))
+    if (ranking[rank] not in opponents):
+      opponents.append(ranking[rank])
+  #
+  # Play all of the children against the opponents together.
+  #
+  pairs = []
+  screened = []
+  for k in range(len(children)):
+    if (evaluated[k] is None):
+      screened.append(k)
+      for j in opponents:
+        pairs.append([children[k], pop[j]])
+  scores = score_parallel(g, pairs, mparam.width_factor, \
+    mparam.height_factor, mparam.time_factor, mparam.num_trials)
+  #
+  worst_seed = find_worst_seed(pop)
+  worst_total = 0.0
+  for j in opponents:
+    worst_total = worst_total + worst_seed.history[j]
+  screens = []
+  for k in range(len(children)):
+    if (evaluated[k] is not None):
+      screens.append([0.0, 0.0, evaluated[k]])
+    else:
+      child_total = 0.0
+      screen_scores = {}
+      p = screened.index(k) * len(opponents)
+      for m in range(len(opponents)):
+        [child_score, opponent_score] = scores[p + m]
+        child_total = child_total + child_score
+        screen_scores[opponents[m]] = [child_score, opponent_score]
+      screens.append([child_total, worst_total, screen_scores])
+  return [opponents, screens]
+#
+# make_child(pop, n) -- returns [pop, message]
+#
+def make_child(pop, n):
+  """
+  Run a tournament to select a seed for reproduction and make the
+  n-th child, with the type of reproduction given by experiment_type_num.
+  The child replaces the least fit seed in the population. This is one
+  trip through the main loop of run_model.py. The message reports on
+  the child and on the change in the best seed of the population.
+  """
+  return make_children(pop, n, 1)
+#
+# make_children(pop, n, num_children) -- returns [pop, message]
+#
+def make_children(pop, n, num_children):
+  """
+  Like make_child(), but make num_children children, numbered n,
+  n + 1, ..., n + num_children - 1, each from its own tournament.
+  The children are all made from the same population, then they
+  replace the num_children least fit seeds, and then the contests
+  of all the children against the population are played together,
+  so they can be shared out among the worker processes in one batch.
+  With one child, this is the same as make_child().
+  """
+  run_length = mparam.run_length
+  tournament_size = mparam.tournament_size
+  experiment_type_num = mparam.experiment_type_num
+  max_area_first = mparam.max_area_first
+  max_area_last = mparam.max_area_last
+  width_factor = mparam.width_factor
+  height_factor = mparam.height_factor
+  time_factor = mparam.time_factor
+  num_trials = mparam.num_trials
+  #
+  # Find the address of the incumbent best seed in the population.
+  #
+  incumbent_seed = find_best_seed(pop)
+  #
+  # Make the children.
+  #
+  candidates = []
+  areas = []
+  children = []
+  reports = []
+  for k in range(num_children):
+    #
+    # Calculate max_seed_area. The maximum seed area increases linearly 
+    # with each new child born. The motivation for this linear limit to 
+    # the seed area is to prevent an explosive increase in seed area, 
+    # which causes the simulation to run extremely slowly. This limit is 
+    # due to a lack of patience on my part; it is not intended to model 
+    # a natural phenomenon.
+    #
+    max_area_delta = max_area_last - max_area_first
+    max_area_increment = max_area_delta * ((n + k) / float(run_length + 1))
+    max_seed_area = max_area_first + max_area_increment
+    #
+    # Run a tournament to select a seed for reproduction. Four types
+    # of reproduction are possible.
+    #
+    # Get a random sample of tournament_size from the population
+    tournament_sample = random_sample(pop, tournament_size)
+    # Find the most fit member of the sample
+    candidate_seed = find_best_seed(tournament_sample)
+    #
+    # Make the child according to the chosen type of reproduction;
+    # that is, chosen according to experiment_type_num.
+    #
+    if (experiment_type_num == 1):
+      # uniform asexual -- note: no need for max_seed_area here
+      [child, report] = uniform_asexual_child(candidate_seed, pop)
+    elif (experiment_type_num == 2):
+      # variable asexual
+      [child, report] = variable_asexual_child(candidate_seed, pop, \
+        max_seed_area)
+    elif (experiment_type_num == 3):
+      # sexual
+      [child, report] = sexual_child(candidate_seed, pop, max_seed_area)
+    else:
+      # symbiotic
+      assert experiment_type_num == 4
+      [child, report] = symbiotic_child(candidate_seed, pop, max_seed_area)
+    candidates.append(candidate_seed)
+    areas.append(max_seed_area)
+    children.append(child)
+    reports.append(report)
+  #
+  # A fusion seed is evaluated before it joins the population. If it
+  # is not accepted, then default to sexual reproduction (see
+  # accept_fusion()).
+  #
+  evaluated = []
+  for k in range(num_children):
+    [children[k], reports[k], known_scores] = accept_fusion(g, pop, \
+      candidates[k], areas[k], children[k], reports[k])
+    evaluated.append(known_scores)
+  #
+  # Pre-screen the children (see prescreen()). A child that fails is
+  # dropped before it plays the whole population. If prescreen_size
+  # is 0, every child passes.
+  #
+  [opponents, screens] = prescreen(g, pop, children, evaluated)
+  kept = []
+  messages = []
+  for k in range(num_children):
+    if (screens[k][0] >= screens[k][1]):
+      kept.append(k)
+      messages.append("")
+    else:
+      messages.append("Run: {}".format(n + k) + \
+        "  Child rejected by pre-screen: " + \
+        "Child score: {:.3f}".format(screens[k][0] / len(opponents)) + \
+        "  Worst seed score: {:.3f}\n".format(screens[k][1] / len(opponents)))
+  #
+  # Replace the least fit old seeds in the population with the children.
+  # It's not a problem if there are ties.
+  #
+  old_seeds = []
+  if (len(kept) > 0):
+    old_seeds = find_worst_seeds(pop, len(kept))
+  addresses = []
+  for m in range(len(kept)):
+    child = children[kept[m]]
+    i = old_seeds[m].address # find the position of the old seed
+    child.address = i # copy the old position into the child
+    intern_seed(child) # share the cells with identical seeds
+    pop[i] = child # replace the old seed with the child
+    addresses.append(i)
+  #
+  # Build a history for the new seeds, by matching them against all
+  # seeds in the population. Since update_history_batch updates i's
+  # score for j and j's score for i, a contest between two of the
+  # children is only played once. The contests from the pre-screen,
+  # or from evaluate_fusion(), are not played again, unless the
+  # opponent has been replaced.
+  #
+  index_pairs = []
+  for m in range(len(kept)):
+    i = addresses[m]
+    screen_scores = screens[kept[m]][2]
+    for j in range(len(pop)):
+      if ((j not in addresses) or (j <= i)):
+        update_similarity(pop, i, j)
+        if ((j in screen_scores) and (j not in addresses)):
+          [scorei, scorej] = screen_scores[j]
+          pop.set_scores([i, j], [j, i], [scorei, scorej])
+        else:
+          index_pairs.append([i, j])
+  update_history_batch(g, pop, index_pairs, width_factor, height_factor, \
+    time_factor, num_trials)
+  #
+  # Report on the new histories of the new seeds.
+  #
+  for m in range(len(kept)):
+    k = kept[m]
+    messages[k] = report_message(n + k, reports[k], old_seeds[m])
+  message = "".join(messages)
+  #
+  # Compare the new best seed with the incumbent best seed.
+  # Note that the fitness of the incumbent will have changed
+  # now that the population has been updated.
+  #
+  incumbent_address = incumbent_seed.address
+  incumbent_fitness = incumbent_seed.fitness()
+  incumbent_area = incumbent_seed.xspan * incumbent_seed.yspan
+  #
+  winning_seed = find_best_seed(pop)
+  winning_address = winning_seed.address
+  winning_fitness = winning_seed.fitness()
+  winning_area = winning_seed.xspan * winning_seed.yspan
+  #
+  seed_similarity = similarity(incumbent_seed, winning_seed)
+  address_change = (incumbent_address != winning_address)
+  fitness_change = winning_fitness - incumbent_fitness
+  area_change = winning_area - incumbent_area
+  #
+  message = message + "Incumbent vs Winner: " + \
+    "  Similarity: {:.3f}".format(seed_similarity) + \
+    "  Address change: {:}".format(address_change) + \
+    "  Fitness change: {:.3f}".format(fitness_change) + \
+    "  Area change: {:.3f}\n".format(area_change)
+  #
+  return [pop, message]
+#
+# initialize_history(g, pop) -- returns NULL
+#
+def initialize_history(g, pop):
+  """
+  Make the seeds of a new population compete against each other, to
+  build up a history of wins and losses, and calculate the similarities.
+  """
+  width_factor = mparam.width_factor
+  height_factor = mparam.height_factor
+  time_factor = mparam.time_factor
+  num_trials = mparam.num_trials
+  #
+  # Every seed competes against every other seed (and itself).
+  # Since update_history_batch updates i's score for j and j's score
+  # for i, we only need to calculate the lower triangle of the matrix
+  # of scores. With the batch backend, the contests are all played
+  # together.
+  #
+  index_pairs = []
+  for i in range(len(pop)):
+    for j in range(i + 1):
+      index_pairs.append([i, j])
+      # While we're here, let's update the similarities.
+      update_similarity(pop, i, j)
+  update_history_batch(g, pop, index_pairs, width_factor, \
+    height_factor, time_factor, num_trials)
+  # 
+  # returns NULL
+  # 
+#
+# evolve_island(island) -- returns island
+#
+def evolve_island(island):
+  """
+  Evolve one island of run_islands.py for one epoch, in a worker
+  process. The island is a list:
+
+    island = [island_num, pop, n, random_state, immigrants, log_name]
+
+  where n is the number of births so far on the island. If pop is None,
+  the initial population is built first. The immigrants replace the
+  least fit seeds in pop and get new histories. Then the island makes
+  children, as in run_model.py, until migration_interval more children
+  have been born or the run is over. Messages go to the log file of
+  the island, and the elite is archived under its log_name. Returns
+  the island, ready for the next epoch.
+  """
+  [island_num, pop, n, random_state, immigrants, log_name] = island
+  rand.setstate(random_state)
+  pop_size = mparam.pop_size
+  run_length = mparam.run_length
+  elite_size = mparam.elite_size
+  log_directory = mparam.log_directory
+  log_path = log_directory + "/" + log_name + ".txt"
+  log_handle = open(log_path, "a", 0) # no buffer, in case of forced exit
+  #
+  # Build the initial population and its history.
+  #
+  if (pop is None):
+    pop = initialize_population(pop_size, mparam.s_xspan, \
+      mparam.s_yspan, mparam.seed_density)
+    initialize_history(g, pop)
+    avg_fit = average_fitness(pop)
+    log_handle.write("Average fitness of the initial population: " + \
+      "{:.3f}\n".format(avg_fit))
+  #
+  # Let the immigrants in. The least fit seeds are all chosen before
+  # any immigrant is put in place, so that an immigrant cannot replace
+  # another immigrant. As in make_children(), the contests of all the
+  # immigrants are played together, and a contest between two
+  # immigrants is only played once.
+  #
+  old_seeds = []
+  if (len(immigrants) > 0):
+    old_seeds = find_worst_seeds(pop, len(immigrants))
+  addresses = []
+  for m in range(len(immigrants)):
+    seed = immigrants[m]
+    i = old_seeds[m].address
+    seed.address = i
+    intern_seed(seed)
+    pop[i] = seed
+    addresses.append(i)
+  index_pairs = []
+  for i in addresses:
+    for j in range(len(pop)):
+      if ((j not in addresses) or (j <= i)):
+        update_similarity(pop, i, j)
+        index_pairs.append([i, j])
+  update_history_batch(g, pop, index_pairs, mparam.width_factor, \
+    mparam.height_factor, mparam.time_factor, mparam.num_trials)
+  for m in range(len(immigrants)):
+    log_handle.write("Immigrant fitness: " + \
+      "{:.3f}".format(immigrants[m].fitness()) + \
+      "  Replaced seed fitness: {:.3f}\n".format(old_seeds[m].fitness()))
+  #
+  # Make children, archiving the elite every pop_size births, as in
+  # run_model.py.
+  #
+  end_n = min(n + mparam.migration_interval, run_length + 1)
+  while (n < end_n):
+    if ((n % pop_size) == 0):
+      run_id_number = n / pop_size
+      archive_elite(pop, elite_size, log_directory, log_name, \
+        run_id_number)
+    [pop, message] = make_child(pop, n)
+    log_handle.write(message)
+    n = n + 1
+  log_handle.close()
+  return [island_num, pop, n, rand.getstate(), [], log_name]
 #
 # hash_pickles(pickle_list) -- returns pickle_hash
 #
@@ -174,7 +174,148 @@ fusion_test_flag = 0
 # the fitnesses of the two members of the pair before they were
 # fused together. If a fused seed fails this test, then one of
 # members of the pair is passed on to Layer 3, the sexual
-# layer.
+# layer. The fused seed is tested before it joins the population,
+# and the test stops as soon as the fused seed can no longer beat
+# one of its members, so a rejected fusion leaves the population
+# unchanged.
 #
 immediate_symbiosis_flag = 1
-#
\ No newline at end of file
+#
+# Contest engine: the simulation backend that plays the Immigration
+# Game for the contests in run_model.py (see Backend in model_classes.py).
+#
+# "golly"    = play the contests in Golly (run_model.py must be
+#              started from Golly)
+# "numpy"    = play the contests one at a time in the headless NumPy
+#              simulator in model_engine.py (run_model.py can be
+#              started from the command line, without Golly)
+# "bitboard" = like "numpy", but the toroid is stored as packed
+#              bit-planes and updated with bitwise adders (faster)
+# "batch"    = like "numpy", but when many contests are needed at
+#              once, as for the initial population, they are stacked
+#              and played together (fastest)
+#
+contest_engine = "golly"
+#
+assert contest_engine in ["golly", "numpy", "bitboard", "batch"]
+#
+# Batch size: with the "batch" engine, the contests for the initial
+# population are played in batches, where all the contests
+# in a batch are stacked in one array and run together. This is the
+# maximum number of contests in a batch. Larger batches run faster but
+# use more memory.
+#
+batch_size = 500
+#
+# Early stop flag: If this flag is 0, then every contest runs for the
+# full number of time steps (see time_factor). If this flag is 1, then
+# a contest stops as soon as its outcome is decided: when all cells
+# have died, or when the toroid has settled into a still life or an
+# oscillator. The scores are exactly the same either way; only the
+# running time changes. The contests are checked every
+# early_stop_interval time steps.
+#
+early_stop_flag = 1
+early_stop_interval = 10
+#
+# Number of workers: the contests for the initial population, and the
+# contests for each new child against the population, are shared out
+# among this many worker processes, each with its own headless
+# backend (see contest_engine). If num_workers is 1, all the contests
+# are played in the main process. The worker processes are started by
+# forking the main process, so num_workers must be 1 with Golly or on
+# Windows.
+#
+num_workers = 1
+#
+assert num_workers >= 1
+assert (num_workers == 1) or (contest_engine != "golly")
+#
+# Checkpoints: every checkpoint_interval births, run_model.py saves
+# the whole state of the run (the population, with the histories and
+# similarities, the number of births so far, the name of the log file,
+# and the state of the random number generator) in log_directory, in
+# the file log_name + "-checkpoint.bin". If checkpoint_interval is 0,
+# no checkpoints are saved.
+#
+# To resume a run that was interrupted, set resume_checkpoint to the
+# path of its checkpoint file. The run continues from the checkpoint,
+# with the same log file and the same series of elite pickles. For a
+# new run, resume_checkpoint is the empty string.
+#
+checkpoint_interval = 500
+resume_checkpoint = ""
+#
+assert checkpoint_interval >= 0
+#
+# Islands: run_islands.py evolves num_islands populations of pop_size
+# seeds, each in its own worker process, with the same reproduction
+# as run_model.py. After every migration_interval births on each
+# island, copies of the migration_size most fit seeds of each island
+# migrate to other islands, where they replace the least fit seeds.
+# With migration_topology "ring", island k sends its migrants to
+# island k + 1 (and the last island sends to the first); with
+# "complete", every island sends its migrants to every other island.
+# The islands need a headless contest_engine and num_workers = 1.
+#
+num_islands = 4
+migration_interval = 200
+migration_size = 2
+migration_topology = "ring"
+#
+assert num_islands >= 1
+assert migration_interval >= 1
+assert migration_size >= 1
+assert migration_topology in ["ring", "complete"]
+#
+# Children per step: run_model.py makes children_per_step children at
+# a time, each from its own tournament on the same population. The
+# children replace the children_per_step least fit seeds, and then all
+# of their contests against the population are played together, so
+# they can be shared out among the worker processes (see num_workers)
+# in one batch. If children_per_step is 1, each child is in the
+# population before the tournament for the next child is run, as in
+# the original steady-state model.
+#
+children_per_step = 1
+#
+assert children_per_step >= 1
+assert children_per_step < pop_size
+#
+# Contest cache: the results of contests are kept in a cache of the
+# contest_cache_size most recently used contests, keyed by the cells
+# of the two seeds and by width_factor, height_factor and time_factor.
+# For each contest, the cache keeps the numbers of wins and ties in
+# all of the trials so far. When two seeds with the same cells meet
+# again, the trials in the cache are used, and only the missing trials
+# are played (if num_trials is larger than the number of trials in the
+# cache). Seeds that reappear in a run, and pairs of seeds that are
+# scored again by the analysis scripts, then cost no simulation. If
+# contest_cache_size is 0, there is no cache, and every contest is
+# played in full, with new random rotations and locations.
+#
+# If contest_cache_path is not the empty string, the cache is loaded
+# from this file, if it exists, and saved to it by run_model.py (with
+# each checkpoint and at the end of the run) and by the analysis
+# scripts that compare seeds.
+#
+contest_cache_size = 0
+contest_cache_path = ""
+#
+assert contest_cache_size >= 0
+#
+# Pre-screen: if prescreen_size is greater than 0, each new child in
+# run_model.py first plays prescreen_size seeds, evenly spaced in the
+# ranking of the population by fitness (from the best seed, through the
+# median, to the worst seed). If the child scores less against these
+# seeds than the least fit seed in the population did, the child is
+# dropped without playing the rest of the population, and that birth
+# leaves the population unchanged. Otherwise, the child replaces the
+# least fit seed as usual, and the contests of the pre-screen count as
+# part of its history. If prescreen_size is 0, there is no pre-screen.
+#
+prescreen_size = 0
+#
+assert prescreen_size >= 0
+assert prescreen_size < pop_size
+#
@@ -0,0 +1,156 @@
+#
+# Run Islands
+#
+# Evolve several populations (islands) at the same time, each in its
+# own worker process, with occasional migration of the most fit seeds
+# between the islands. Each island evolves in the same way as the one
+# population of run_model.py (see make_child() in model_functions.py).
+# Between epochs of migration_interval births, the main process
+# collects the islands and moves the migrants (see the island
+# parameters in model_parameters.py).
+#
+# The islands use the headless backends, so this script is started
+# from a command prompt, in Linux or Mac OS:
+#
+# > python run_islands.py
+#
+import model_functions as mfunc
+import model_parameters as mparam
+import multiprocessing
+import random as rand
+import copy
+import time
+import sys
+#
+# The islands run in forked worker processes, so they cannot use
+# Golly, and they cannot have workers of their own.
+#
+assert mparam.contest_engine != "golly"
+assert mparam.num_workers == 1
+assert sys.platform != "win32"
+#
+g = mfunc.g
+#
+# -----------------------------------------------------------------
+# Make a file for logging the results. The filename is based on the
+# date, so that log files can easily be ordered by date. Each island
+# also has its own log file and its own series of elite pickles, with
+# names based on the name of this log file.
+# -----------------------------------------------------------------
+#
+log_name = time.strftime("log-20%y-%m-%d-%Hh-%Mm-%Ss", \
+  time.localtime())
+log_path = mparam.log_directory + "/" + log_name + ".txt"
+# use 0 so that log file writes immediately (no buffer), 
+# in case of forced exit
+log_handle = open(log_path, "w", 0) 
+start_time = time.strftime("Start time: 20%y-%m-%d %Hh:%Mm:%Ss\n", \
+  time.localtime())
+mfunc.show_message(g, log_handle, start_time)
+# show parameter settings
+parameter_settings = mfunc.show_parameters()
+mfunc.show_message(g, log_handle, "\nParameter Settings\n\n")
+for setting in parameter_settings:
+  mfunc.show_message(g, log_handle, setting + "\n")
+mfunc.show_message(g, log_handle, "\n")
+#
+# -----------------------------------------------------------------
+# Set the random number generator seed here. If random_seed is 
+# negative, then Python will automatically set a random number 
+# seed. Each island has its own random number generator, seeded
+# from this one, so that the islands do not depend on which worker
+# process runs them.
+# -----------------------------------------------------------------
+#
+random_seed = mparam.random_seed
+if (random_seed >= 0):
+  rand.seed(random_seed)
+#
+# -----------------------------------------------------------------
+# Make the islands. The populations are built by the workers, in the
+# first epoch (see evolve_island() in model_functions.py).
+# -----------------------------------------------------------------
+#
+num_islands = mparam.num_islands
+migration_size = mparam.migration_size
+migration_topology = mparam.migration_topology
+run_length = mparam.run_length
+#
+islands = []
+for island_num in range(num_islands):
+  island_random = rand.Random(rand.getrandbits(32))
+  island_name = log_name + "-island-" + str(island_num)
+  island_handle = open(mparam.log_directory + "/" + island_name + \
+    ".txt", "w")
+  island_handle.write("Island " + str(island_num) + " of " + \
+    str(num_islands) + " (see " + log_name + ".txt)\n")
+  island_handle.close()
+  islands.append([island_num, None, 0, island_random.getstate(), [], \
+    island_name])
+#
+message = "Building " + str(num_islands) + \
+  " initial populations of size: " + str(mparam.pop_size) + "\n"
+mfunc.show_message(g, log_handle, message)
+#
+# -----------------------------------------------------------------
+# Run the islands in epochs, until run_length children have been
+# born on each island, with migration between the epochs.
+# -----------------------------------------------------------------
+#
+pool = multiprocessing.Pool(num_islands)
+#
+while (islands[0][2] <= run_length):
+  islands = pool.map(mfunc.evolve_island, islands)
+  #
+  # Log the average fitness of each island.
+  #
+  message = "Births per island: " + str(islands[0][2])
+  for [island_num, pop, n, random_state, immigrants, island_name] \
+    in islands:
+    message = message + \
+      "  Island {}: {:.3f}".format(island_num, mfunc.average_fitness(pop))
+  mfunc.show_message(g, log_handle, message + "\n")
+  #
+  # Migrate copies of the most fit seeds of each island, unless the
+  # run is over.
+  #
+  if ((islands[0][2] > run_length) or (num_islands == 1)):
+    continue
+  for source in range(num_islands):
+    pop = islands[source][1]
+    migrants = mfunc.find_top_seeds(pop, migration_size)
+    if (migration_topology == "ring"):
+      destinations = [(source + 1) % num_islands]
+    else:
+      assert migration_topology == "complete"
+      destinations = []
+      for destination in range(num_islands):
+        if (destination != source):
+          destinations.append(destination)
+    for destination in destinations:
+      for seed in migrants:
+        islands[destination][4].append(copy.deepcopy(seed))
+    message = "Migration: island " + str(source) + " sends " + \
+      str(migration_size) + " seeds to islands " + str(destinations) + \
+      "  Migrant fitness: {:.3f}\n".format(migrants[0].fitness())
+    mfunc.show_message(g, log_handle, message)
+  #
+#
+pool.close()
+pool.join()
+#
+# -----------------------------------------------------------------
+# Close the log file.
+# -----------------------------------------------------------------
+#
+for [island_num, pop, n, random_state, immigrants, island_name] in islands:
+  avg_fit = mfunc.average_fitness(pop)
+  message = "Average fitness of the final population of island " + \
+    "{}: {:.3f}\n".format(island_num, avg_fit)
+  mfunc.show_message(g, log_handle, message)
+#
+end_time = time.strftime("End time: 20%y-%m-%d %Hh:%Mm:%Ss\n", time.localtime())
+mfunc.show_message(g, log_handle, end_time)
+log_handle.close()
+#
+#
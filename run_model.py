@@ -14,7 +14,6 @@
 # Proceedings of the Third International Conference on Genetic 
 # Algorithms (ICGA-89), pp. 116-121. California: Morgan Kaufmann. 
 #
-import golly as g
 import model_classes as mclass
 import model_functions as mfunc
 import model_parameters as mparam
@@ -23,40 +22,68 @@ import copy
 import time
 import pickle
 #
+# The simulation backend: Golly, or one of the headless Immigration
+# Game engines, depending on contest_engine in model_parameters.py.
+#
+g = mfunc.g
+#
 # -----------------------------------------------------------------
 # Make a file for logging the results. The filename is based on the
-# date, so that log files can easily be ordered by date.
+# date, so that log files can easily be ordered by date. If the run
+# is resumed from a checkpoint (see resume_checkpoint in
+# model_parameters.py), restore the population, the number of births
+# so far, the random number generator, and the contest cache, and
+# continue with the log file of the run. The births that were logged
+# after the checkpoint was saved are cut from the log, since they
+# will be made (and logged) again.
 # -----------------------------------------------------------------
 #
-log_name = time.strftime("log-20%y-%m-%d-%Hh-%Mm-%Ss", \
-  time.localtime())
+resume_checkpoint = mparam.resume_checkpoint
+if (resume_checkpoint != ""):
+  [pop, resume_n, log_name, log_size] = \
+    mfunc.load_checkpoint(resume_checkpoint)
+else:
+  log_name = time.strftime("log-20%y-%m-%d-%Hh-%Mm-%Ss", \
+    time.localtime())
+  resume_n = -1 # not resumed
 log_path = mparam.log_directory + "/" + log_name + ".txt"
+checkpoint_path = mparam.log_directory + "/" + log_name + \
+  "-checkpoint.bin"
 # use 0 so that log file writes immediately (no buffer), 
 # in case of forced exit
-log_handle = open(log_path, "w", 0) 
-start_time = time.strftime("Start time: 20%y-%m-%d %Hh:%Mm:%Ss\n", \
-  time.localtime())
-mfunc.show_message(g, log_handle, start_time)
-# show parameter settings
-parameter_settings = mfunc.show_parameters()
-mfunc.show_message(g, log_handle, "\nParameter Settings\n\n")
-for setting in parameter_settings:
-  mfunc.show_message(g, log_handle, setting + "\n")
-mfunc.show_message(g, log_handle, "\n")
+if (resume_n >= 0):
+  log_handle = open(log_path, "a", 0) # append to the existing log file
+  if (log_size is not None):
+    log_handle.truncate(log_size)
+  message = "Resumed from checkpoint at n = " + str(resume_n) + "\n"
+  mfunc.show_message(g, log_handle, message)
+else:
+  log_handle = open(log_path, "w", 0)
+  start_time = time.strftime("Start time: 20%y-%m-%d %Hh:%Mm:%Ss\n", \
+    time.localtime())
+  mfunc.show_message(g, log_handle, start_time)
+  # show parameter settings
+  parameter_settings = mfunc.show_parameters()
+  mfunc.show_message(g, log_handle, "\nParameter Settings\n\n")
+  for setting in parameter_settings:
+    mfunc.show_message(g, log_handle, setting + "\n")
+  mfunc.show_message(g, log_handle, "\n")
 #
 # -----------------------------------------------------------------
 # Set the random number generator seed here. If random_seed is 
 # negative, then Python will automatically set a random number 
 # seed. Note that, if random_seed is negative, then the experiment 
-# cannot be exactly repeated.
+# cannot be exactly repeated. A resumed run continues with the
+# random number generator state from the checkpoint.
 # -----------------------------------------------------------------
 #
 random_seed = mparam.random_seed
-if (random_seed >= 0):
+if ((random_seed >= 0) and (resume_n < 0)):
   rand.seed(random_seed)
 #
 # -----------------------------------------------------------------
 # Build the initial population. Initialize the seeds randomly.
+# A resumed run already has its population.
 # -----------------------------------------------------------------
 #
 seed_density = mparam.seed_density # density of state 1 in seed
@@ -66,42 +93,34 @@ s_xspan = mparam.s_xspan # width of seed
 s_yspan = mparam.s_yspan # height of seed
 pop_size = mparam.pop_size # fixed population size
 #
-message = "Building initial population of size: " + str(pop_size) + "\n"
-mfunc.show_message(g, log_handle, message)
-#
-pop = mfunc.initialize_population(pop_size, s_xspan, s_yspan, \
-  seed_density)
-#
-# -----------------------------------------------------------------
-# Make the seeds compete against each other, to build up a history
-# of wins and losses for the initial population.
-# -----------------------------------------------------------------
-#
-width_factor = mparam.width_factor
-height_factor = mparam.height_factor
-time_factor = mparam.time_factor
-num_trials = mparam.num_trials
-#
-message = "Building a history for initial population.\n"
-mfunc.show_message(g, log_handle, message)
-#
-# Every seed competes against every other seed (and itself)
-for i in range(pop_size):
-  # Since mfunc.update_history updates i's score for j and j's score for i,
-  # we only need to calculate the lower triangle of the matrix of scores.
-  for j in range(i + 1):
-    mfunc.update_history(g, pop, i, j, width_factor, height_factor, \
-      time_factor, num_trials)
-    # While we're here, let's update the similarities.
-    mfunc.update_similarity(pop, i, j)
-#
-# -----------------------------------------------------------------
-# Log the average population fitness for the initial population.
-# -----------------------------------------------------------------
+if (resume_n < 0):
+  #
+  message = "Building initial population of size: " + str(pop_size) + "\n"
+  mfunc.show_message(g, log_handle, message)
+  #
+  pop = mfunc.initialize_population(pop_size, s_xspan, s_yspan, \
+    seed_density)
+  #
+  # ---------------------------------------------------------------
+  # Make the seeds compete against each other, to build up a history
+  # of wins and losses for the initial population.
+  # ---------------------------------------------------------------
+  #
+  message = "Building a history for initial population.\n"
+  mfunc.show_message(g, log_handle, message)
+  #
+  mfunc.initialize_history(g, pop)
+  #
+  # ---------------------------------------------------------------
+  # Log the average population fitness for the initial population.
+  # ---------------------------------------------------------------
+  #
+  avg_fit = mfunc.average_fitness(pop)
+  message = "Average fitness of the initial population: {:.3f}\n".format(avg_fit)
+  mfunc.show_message(g, log_handle, message)
+  #
 #
-avg_fit = mfunc.average_fitness(pop)
-message = "Average fitness of the initial population: {:.3f}\n".format(avg_fit)
-mfunc.show_message(g, log_handle, message)
+assert len(pop) == pop_size
 #
 # -----------------------------------------------------------------
 # Run the system until run_length children have been born.
@@ -110,12 +129,10 @@ mfunc.show_message(g, log_handle, message)
 # Get some parameter values from model_parameters.py.
 #
 run_length = mparam.run_length
-tournament_size = mparam.tournament_size
 elite_size = mparam.elite_size
 log_directory = mparam.log_directory
-experiment_type_num = mparam.experiment_type_num
-max_area_first = mparam.max_area_first
-max_area_last = mparam.max_area_last
+checkpoint_interval = mparam.checkpoint_interval
+children_per_step = mparam.children_per_step
 #
 # We add 1 to run_length so that a run_length of, say, 1000, will
 # yield a range of 0, 1, ..., 1000. Then, if pop_size is, say, 100,
@@ -123,99 +140,65 @@ max_area_last = mparam.max_area_last
 # pop_size = 100, so ((n % pop_size) == 0) will be true, and
 # the final trip will be archived.
 #
-for n in range(run_length + 1): 
+# Each trip through the loop makes children_per_step children,
+# numbered n, n + 1, ..., n + num_children - 1 (fewer at the end of
+# the run).
+#
+# A resumed run starts again at the birth where its checkpoint was
+# saved.
+#
+n = max(resume_n, 0)
+while (n <= run_length):
+  #
+  num_children = min(children_per_step, run_length + 1 - n)
+  #
+  # The number of births from n to the next integer multiple of
+  # pop_size (0 if n is itself a multiple).
+  #
+  to_next_gen = (pop_size - (n % pop_size)) % pop_size
+  #
+  # Every checkpoint_interval births, save the state of the run, so
+  # that the run can be resumed from here. The checkpoint is saved
+  # before anything else is done for birth n, so a resumed run does
+  # exactly what this run would have done next. There is no need to
+  # save the checkpoint that the run was resumed from again. When
+  # several children are made at once, the checkpoint is saved at
+  # the start of the step that includes the checkpoint birth.
+  #
+  if ((checkpoint_interval > 0) and (n != resume_n) and \
+    (((checkpoint_interval - (n % checkpoint_interval)) % \
+    checkpoint_interval) < num_children)):
+    mfunc.save_checkpoint(checkpoint_path, pop, n, log_name, \
+      log_handle.tell())
+    mfunc.save_contest_cache()
   #
   # If n (the number of children born so far) is an integer multiple
   # of pop_size (the population size), then store the top elite_size
   # seeds in the population, as a benchmark for measuring progress
-  # in evolution.
+  # in evolution. When several children are made at once, the elite
+  # is stored at the start of the step that includes that birth.
   #
-  if ((n % pop_size) == 0): # if n divides evenly by pop_size ...
-    run_id_number = n / pop_size # ... an integer is expected here
+  if (to_next_gen < num_children): # if the step includes a multiple ...
+    run_id_number = (n + to_next_gen) / pop_size # ... an integer here
     # Store the elite of the population for later analysis.
     mfunc.archive_elite(pop, elite_size, log_directory, \
       log_name, run_id_number)
     #
   #
-  # Calculate max_seed_area. The maximum seed area increases linearly 
-  # with each new child born. The motivation for this linear limit to 
-  # the seed area is to prevent an explosive increase in seed area, 
-  # which causes the simulation to run extremely slowly. This limit is 
-  # due to a lack of patience on my part; it is not intended to model 
-  # a natural phenomenon.
-  #
-  max_area_delta = max_area_last - max_area_first
-  max_area_increment = max_area_delta * (n / float(run_length + 1))
-  max_seed_area = max_area_first + max_area_increment
-  #
-  # Run a tournament to select a seed for reproduction. Four types
-  # of reproduction are possible.
-  #
-  # Get a random sample of tournament_size from the population
-  tournament_sample = mfunc.random_sample(pop, tournament_size)
-  # Find the most fit member of the sample
-  candidate_seed = mfunc.find_best_seed(tournament_sample)
-  #
-  # Find the address of the incumbent best seed in the population.
-  #
-  incumbent_seed = mfunc.find_best_seed(pop)
-  #
-  # Update the population according to the chosen type of reproduction;
-  # that is, chosen according to experiment_type_num.
-  #
-  if (experiment_type_num == 1):
-    # uniform asexual -- note: no need for max_seed_area here
-    [pop, message] = mfunc.uniform_asexual(candidate_seed, \
-      pop, n)
-    mfunc.show_message(g, log_handle, message)
-  elif (experiment_type_num == 2):
-    # variable asexual
-    [pop, message] = mfunc.variable_asexual(candidate_seed, \
-      pop, n, max_seed_area)
-    mfunc.show_message(g, log_handle, message)
-  elif (experiment_type_num == 3):
-    # sexual
-    [pop, message] = mfunc.sexual(candidate_seed, pop, n, \
-      max_seed_area)
-    mfunc.show_message(g, log_handle, message)
-  else:
-    # symbiotic
-    assert experiment_type_num == 4
-    [pop, message] = mfunc.symbiotic(candidate_seed, pop, n, \
-      max_seed_area)
-    mfunc.show_message(g, log_handle, message)
-  #
-  # Compare the new best seed with the incumbent best seed.
-  # Note that the fitness of the incumbent will have changed
-  # now that the population has been updated.
-  #
-  incumbent_address = incumbent_seed.address
-  incumbent_fitness = incumbent_seed.fitness()
-  incumbent_area = incumbent_seed.xspan * incumbent_seed.yspan
-  #
-  winning_seed = mfunc.find_best_seed(pop)
-  winning_address = winning_seed.address
-  winning_fitness = winning_seed.fitness()
-  winning_area = winning_seed.xspan * winning_seed.yspan
-  #
-  similarity = mfunc.similarity(incumbent_seed, winning_seed)
-  address_change = (incumbent_address != winning_address)
-  fitness_change = winning_fitness - incumbent_fitness
-  area_change = winning_area - incumbent_area
-  #
-  message = "Incumbent vs Winner: " + \
-    "  Similarity: {:.3f}".format(similarity) + \
-    "  Address change: {:}".format(address_change) + \
-    "  Fitness change: {:.3f}".format(fitness_change) + \
-    "  Area change: {:.3f}\n".format(area_change)
+  # Make the next num_children children and replace the least fit
+  # seeds with them.
   #
+  [pop, message] = mfunc.make_children(pop, n, num_children)
   mfunc.show_message(g, log_handle, message)
+  n = n + num_children
   #
 #
 # -----------------------------------------------------------------
 # Close the log file.
 # -----------------------------------------------------------------
 #
+mfunc.save_contest_cache()
+#
 avg_fit = mfunc.average_fitness(pop)
 message = "Average fitness of the final population: {:.3f}\n".format(avg_fit)
 mfunc.show_message(g, log_handle, message)
@@ -5,7 +5,7 @@
 #
 # Select two seeds from pickles and watch them battle.
 #
-import golly as g
+import golly
 import model_classes as mclass
 import model_functions as mfunc
 import model_parameters as mparam
@@ -14,6 +14,11 @@ import time
 import pickle
 import os
 #
+# The contest is played through a Golly backend (see Backend in
+# model_classes.py), which passes the dialog calls on to Golly.
+#
+g = mfunc.get_backend(golly)
+#
 # Open a dialog window and ask the user to select two pickles.
 #
 g.note("View Contest\n\n" + \
@@ -71,12 +76,9 @@ while True:
   # switch red to blue in the second seed
   s2.red2blue()
   # set up Golly
-  rule_name = "Immigration"
   [g_width, g_height, g_time] = mfunc.dimensions(s1, s2, \
       width_factor, height_factor, time_factor)
-  g.setalgo("QuickLife") # use the QuickLife algorithm
-  g.new(rule_name) # initialize cells to state 0
-  g.setrule(rule_name + ":T" + str(g_width) + "," + str(g_height)) # make a toroid
+  mfunc.prepare_toroid(g, g_width, g_height) # make an empty toroid
   [g_xmin, g_xmax, g_ymin, g_ymax] = mfunc.get_minmax(g) # find range of coordinates
   s1.insert(g, g_xmin, -1, g_ymin, g_ymax) # insert the first seed into Golly
   s2.insert(g, +1, g_xmax, g_ymin, g_ymax) # insert the second seed into Golly
@@ -40,7 +40,7 @@ seed = pickle[0]
 #
 for x in range(seed.xspan):
     for y in range(seed.yspan):
-        state = seed.cells[x][y]
+        state = int(seed.cells[x][y])
         g.setcell(x, y, state)
 #
 # Fit the pattern to the viewport.